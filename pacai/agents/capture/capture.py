@@ -153,6 +153,15 @@ class CaptureAgent(BaseAgent):
         else:
             return gameState.getScore() * -1
 
+    def getLayoutAnalysis(self, gameState):
+        """
+        Returns the `pacai.core.layoutAnalysis.LayoutAnalysis` of the board
+        (dead ends, articulation points, and the border between the sides).
+        The analysis is only done once per layout, so this is cheap to call every turn.
+        """
+
+        return gameState.getInitialLayout().getAnalysis()
+
     def getMazeDistance(self, pos1, pos2):
         """
         Returns the distance between two points using the builtin distancer.
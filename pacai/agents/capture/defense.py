@@ -29,7 +29,7 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
         features['numInvaders'] = len(invaders)
 
         if (len(invaders) > 0):
-            dists = [self.getMazeDistance(myPos, a.getPosition()) for a in invaders]
+            dists = self.distancer.getDistances(myPos, [a.getPosition() for a in invaders])
             features['invaderDistance'] = min(dists)
 
         if (action == Directions.STOP):
@@ -3,7 +3,6 @@ import random
 import time
 
 from pacai.agents.capture.capture import CaptureAgent
-from pacai.util import util
 
 class ReflexCaptureAgent(CaptureAgent):
     """
@@ -34,14 +33,8 @@ class ReflexCaptureAgent(CaptureAgent):
         Finds the next successor which is a grid position (location tuple).
         """
 
-        successor = gameState.generateSuccessor(self.index, action)
-        pos = successor.getAgentState(self.index).getPosition()
-
-        if (pos != util.nearestPoint(pos)):
-            # Only half a grid position was covered.
-            return successor.generateSuccessor(self.index, action)
-        else:
-            return successor
+        # Actions come from getLegalActions(), so there is no need to check them again.
+        return gameState.generateGridSuccessor(self.index, action, validate = False)
 
     def evaluate(self, gameState, action):
         """
@@ -1,7 +1,6 @@
 import random
 
 from pacai.agents.base import BaseAgent
-from pacai.core.directions import Directions
 from pacai.util import reflection
 
 class GreedyAgent(BaseAgent):
@@ -17,12 +16,8 @@ class GreedyAgent(BaseAgent):
 
     def getAction(self, state):
         # Generate candidate actions
-        legal = state.getLegalPacmanActions()
-        if (Directions.STOP in legal):
-            legal.remove(Directions.STOP)
-
-        successors = [(state.generateSuccessor(0, action), action) for action in legal]
-        scored = [(self.evaluationFunction(state), action) for state, action in successors]
+        successors = state.generateSuccessors(0, includeStop = False)
+        scored = [(self.evaluationFunction(state), action) for action, state in successors]
         bestScore = max(scored)[0]
         bestActions = [pair[1] for pair in scored if pair[0] == bestScore]
 
@@ -5,6 +5,7 @@ from typing import Callable, Union
 from pacai.agents.base import BaseAgent
 from pacai.core.directions import Directions
 from pacai.core.gamestate import AbstractGameState
+from pacai.core.search import engine
 from pacai.core.search.heuristic import null as nullHeuristic
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
@@ -19,6 +20,10 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    Search functions can be given by their fully qualified name,
+    or by their short name (e.g. `ucs` or `astar`) to use the reference searches
+    in `pacai.core.search.engine`.
     """
 
     def __init__(self, index,
@@ -65,7 +70,7 @@ class SearchAgent(BaseAgent):
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem.
 
-        self._actions = self.searchFunction(problem)  # Find a path.
+        self._actions = problem.expandActions(self.searchFunction(problem))  # Find a path.
         self._actionIndex = 0
 
         totalCost = problem.actionsCost(self._actions)
@@ -99,7 +104,12 @@ class SearchAgent(BaseAgent):
         """
 
         # Locate the function.
-        function = reflection.qualifiedImport(functionName)
+        if ('.' in functionName):
+            function = reflection.qualifiedImport(functionName)
+        elif (functionName in engine.SEARCH_FUNCTIONS):
+            function = engine.SEARCH_FUNCTIONS[functionName]
+        else:
+            raise ValueError("Unknown search function: '%s'." % (functionName))
 
         # Check if the function has a heuristic.
         if 'heuristic' not in function.__code__.co_varnames:
@@ -15,12 +15,14 @@ from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
+from pacai.core import distanceCalculator
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core.layout import setUseSidecars
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
@@ -43,6 +45,9 @@ class CaptureGameState(AbstractGameState):
     A game state specific to capture.
     """
 
+    __slots__ = ('_timeleft', '_blueTeam', '_redTeam', '_teams', '_redCapsules', '_blueCapsules',
+            '_redFood', '_blueFood', '_redFoodPositions', '_blueFoodPositions')
+
     def __init__(self, layout, timeleft):
         super().__init__(layout)
 
@@ -78,18 +83,20 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        self._redFood = BitGrid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        self._blueFood = BitGrid(self._food.getWidth(), self._food.getHeight(),
+                initialValue = False)
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
+        self._redFoodPositions = set()
+        self._blueFoodPositions = set()
 
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        for (x, y) in self._food.asList():
+            if (self.isOnRedSide((x, y))):
+                self._redFood.set(x, y, True)
+                self._redFoodPositions.add((x, y))
+            else:
+                self._blueFood.set(x, y, True)
+                self._blueFoodPositions.add((x, y))
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -127,13 +134,17 @@ class CaptureGameState(AbstractGameState):
         if (not self._foodCopied):
             self._redFood = self._redFood.copy()
             self._blueFood = self._blueFood.copy()
+            self._redFoodPositions = self._redFoodPositions.copy()
+            self._blueFoodPositions = self._blueFoodPositions.copy()
 
         super().eatFood(x, y)
 
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._redFood.set(x, y, False)
+            self._redFoodPositions.discard((x, y))
         else:
-            self._blueFood[x][y] = False
+            self._blueFood.set(x, y, False)
+            self._blueFoodPositions.discard((x, y))
 
     def getBlueCapsules(self):
         """
@@ -153,6 +164,14 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueFood
 
+    def getBlueFoodPositions(self):
+        """
+        Returns a set of the positions (x, y) of the food on the blue team's side.
+        The caller should not modify the set.
+        """
+
+        return self._blueFoodPositions
+
     def getBlueTeamIndices(self):
         """
         Returns a list of the agent index numbers for the agents on the blue team.
@@ -179,6 +198,28 @@ class CaptureGameState(AbstractGameState):
 
         return self._redFood
 
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue team's side.
+        """
+
+        return len(self._blueFoodPositions)
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red team's side.
+        """
+
+        return len(self._redFoodPositions)
+
+    def getRedFoodPositions(self):
+        """
+        Returns a set of the positions (x, y) of the food on the red team's side.
+        The caller should not modify the set.
+        """
+
+        return self._redFoodPositions
+
     def getRedTeamIndices(self):
         """
         Returns a list of agent index numbers for the agents on the red team.
@@ -224,15 +265,48 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _restoreUndoFields(self, fields):
+        (baseFields, self._timeleft, self._redCapsules, self._blueCapsules,
+                self._redFood, self._blueFood, self._redFoodPositions,
+                self._blueFoodPositions) = fields
+
+        super()._restoreUndoFields(baseFields)
+
+    # Override
+    def _saveUndoFields(self):
+        return (super()._saveUndoFields(), self._timeleft, self._redCapsules, self._blueCapsules,
+                self._redFood, self._blueFood, self._redFoodPositions, self._blueFoodPositions)
+
+    # Override
+    def _cloneInto(self, successor):
+        super()._cloneInto(successor)
+
+        successor._timeleft = self._timeleft
+
+        # Teams never change.
+        successor._blueTeam = self._blueTeam
+        successor._redTeam = self._redTeam
+        successor._teams = self._teams
+
+        # The rest are copied on write along with the capsules and food.
+        successor._redCapsules = self._redCapsules
+        successor._blueCapsules = self._blueCapsules
+        successor._redFood = self._redFood
+        successor._blueFood = self._blueFood
+        successor._redFoodPositions = self._redFoodPositions
+        successor._blueFoodPositions = self._blueFoodPositions
+
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, validate = True):
         """
         Apply the action to the context state (self).
         """
 
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, validate)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
@@ -247,6 +321,11 @@ class CaptureRules:
     """
 
     def newGame(self, layout, agents, display, length, catchExceptions):
+        # Agents use maze distances and the layout analysis,
+        # get them ready before the agents' startup clocks start.
+        distanceCalculator.precomputeDistances(layout)
+        layout.getAnalysis()
+
         initState = CaptureGameState(layout, length)
         starter = random.randint(0, 1)
         logging.info('%s team starts' % ['Red', 'Blue'][starter])
@@ -255,8 +334,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +358,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -342,20 +421,20 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection())
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, validate = True):
         """
         Edits the state to reflect the results of the action.
+        If validate is false, then the action is trusted to be legal.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
+        if (validate and action not in AgentRules.getLegalActions(state, agentIndex)):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state.getMutableAgentState(agentIndex)
 
         # Update position.
         vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
@@ -392,8 +471,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +493,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -455,10 +534,10 @@ class AgentRules:
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
-                agentState.respawn()
+                state.getMutableAgentState(agentIndex).respawn()
 
 #############################
 # FRAMEWORK TO START A GAME #
@@ -519,6 +598,11 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to blue team (e.g. \'opt1=val1,opt2\') '
                 + '(default: %(default)s)')
 
+    parser.add_argument('--distance-cache', dest = 'distanceCache',
+            action = 'store', type = str, default = None,
+            help = 'save maze distances in this directory so later games can reuse them '
+                + '(default: %(default)s)')
+
     parser.add_argument('--keys0', dest = 'keys0',
             action = 'store_true', default = False,
             help = 'make agent 0 (first red player) a keyboard agent (default: %(default)s)')
@@ -535,6 +619,11 @@ def readCommand(argv):
             action = 'store_true', default = False,
             help = 'make agent 3 (second blue player) a keyboard agent (default: %(default)s)')
 
+    parser.add_argument('--layout-cache', dest = 'layoutCache',
+            action = 'store_true', default = False,
+            help = 'save compiled layouts next to their layout files so later games can reuse them '
+                + '(default: %(default)s)')
+
     parser.add_argument('--max-moves', dest = 'maxMoves',
             action = 'store', type = int, default = 1200,
             help = 'set maximum number of moves in a game (default: %(default)s)')
@@ -578,6 +667,9 @@ def readCommand(argv):
 
         args['display'] = CaptureGUIView(fps = options.fps, title = 'Capture', **viewOptions)
 
+    distanceCalculator.setCacheDir(options.distanceCache)
+    setUseSidecars(options.layoutCache)
+
     args['redTeamName'] = options.red
     args['blueTeamName'] = options.blue
 
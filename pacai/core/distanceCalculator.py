@@ -1,10 +1,45 @@
+import array
+import collections
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
 import sys
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# Distances are stored as unsigned shorts, the largest one marks unreachable positions.
+# A distance is always less than the number of open positions,
+# so layouts with UNREACHABLE or more open positions are not supported (see _buildAdjacency()).
+UNREACHABLE = 0xFFFF
+
+# Distance tables saved to disk (see setCacheDir()) are a header followed by the raw distances.
+# The header is: magic, a byte order check, width, height, and the number of open positions.
+CACHE_FILE_EXTENSION = '.dist'
+CACHE_FILE_HEADER = struct.Struct('=8sIIII')
+CACHE_FILE_MAGIC = b'PACDIST1'
+CACHE_FILE_BYTE_ORDER = 0x01020304
+
+# A full table for this many positions takes about 12 MB, and a second or so to compute.
+LAZY_THRESHOLD = 2500
+
+# The default memory limit for the rows kept by a `LazyDistanceTable`.
+LAZY_MAX_BYTES = 16 * 1024 * 1024
+
+ROW_ITEM_BYTES = array.array('H').itemsize
+
+# How many distance tables are kept around for layouts that were seen before.
+# Runs over many random layouts would otherwise keep every table until the process exits.
+MAX_CACHED_TABLES = 8
+
+# Layouts with more open positions than this use landmarks instead of any rows of the table.
+LANDMARK_THRESHOLD = 10000
+NUM_LANDMARKS = 16
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -47,16 +82,123 @@ class Distancer(object):
 
         return bestDistance
 
+    def getDistanceMatrix(self, positions1, positions2):
+        """
+        Get the distances between every pair of positions,
+        as a list with a row of distances (see getDistances()) for each of positions1.
+        The table is only looked up once for each of positions2, and once per row.
+        """
+
+        positions2 = list(positions2)
+        if (self._distances is None):
+            return [[manhattan(pos1, pos2) for pos2 in positions2] for pos1 in positions1]
+
+        targets = self._getSnapIndexes(positions2)
+        return [self._getDistancesToSnaps(pos1, targets) for pos1 in positions1]
+
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        return self._distances.getDistanceOnGrid(pos1, pos2)
+
+    def getDistances(self, pos1, positions):
+        """
+        Get a list of the distances from pos1 to each of the positions.
+        This is the same as calling getDistance() for each position,
+        but all the distances come from a single row of the table
+        (or one row per grid position that pos1 is between).
+        """
+
+        if (self._distances is None):
+            return [manhattan(pos1, pos2) for pos2 in positions]
+
+        return self._getDistancesToSnaps(pos1, self._getSnapIndexes(positions))
+
+    def getLowerBound(self, pos1, pos2):
+        """
+        Get a distance that is no more than getDistance() (useful for heuristics).
+        This is as fast as a table lookup, even when the maze is too big for a full table.
+        """
+
+        if (self._distances is None or not isInt(pos1) or not isInt(pos2)):
+            return manhattan(pos1, pos2)
+
+        return self._distances.getLowerBound(pos1, pos2)
+
+    def getNearest(self, pos1, positions):
+        """
+        Get the position that is closest to pos1 and its distance, as a tuple.
+        Ties go to the position that comes first.
+        Raises a ValueError if there are no positions.
+        """
 
-        raise Exception("Position not in grid: " + str(key))
+        positions = list(positions)
+        distances = self.getDistances(pos1, positions)
+
+        index = min(range(len(distances)), key = distances.__getitem__)
+        return positions[index], distances[index]
 
     def isReadyForMazeDistance(self):
         return (self._distances is not None)
 
+    def _getDistancesToSnaps(self, pos1, targets):
+        """
+        Get the distances from pos1 to targets from _getSnapIndexes(),
+        the same way that getDistance() does.
+        """
+
+        table = self._distances
+
+        sources = []
+        for (snap, snapDistance) in getGrids2D(pos1):
+            sources.append((table.getRow(table.getIndex(snap)), snapDistance))
+
+        # Only grid to grid distances can be read straight out of the row.
+        exactRow = None
+        if (isInt(pos1)):
+            exactRow = sources[0][0]
+
+        distances = []
+        for (exact, snaps) in targets:
+            if (exact and exactRow is not None):
+                distance = exactRow[snaps[0][0]]
+                if (distance == UNREACHABLE):
+                    distance = sys.maxsize
+
+                distances.append(distance)
+                continue
+
+            bestDistance = DEFAULT_DISTANCE
+            for (row, snap1Distance) in sources:
+                for (index, snap2Distance) in snaps:
+                    gridDistance = row[index]
+                    if (gridDistance == UNREACHABLE):
+                        gridDistance = sys.maxsize
+
+                    bestDistance = min(bestDistance, gridDistance + snap1Distance + snap2Distance)
+
+            distances.append(bestDistance)
+
+        return distances
+
+    def _getSnapIndexes(self, positions):
+        """
+        Get the table indexes of the grid positions around each position,
+        as a list of (is a grid position, [(index, distance to the grid position), ...]).
+        """
+
+        table = self._distances
+
+        targets = []
+        for position in positions:
+            if (isInt(position)):
+                targets.append((True, [(table.getIndex(position), 0)]))
+                continue
+
+            snaps = [(table.getIndex(snap), snapDistance)
+                    for (snap, snapDistance) in getGrids2D(position)]
+            targets.append((False, snaps))
+
+        return targets
+
 def isInt(pos):
     x, y = pos
     return x == int(x) and y == int(y)
@@ -78,79 +220,593 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
+# Distance tables shared by the whole process, keyed by getWallsKey().
+# Tables are immutable, so every distancer for the same walls can use the same one.
+# Only the most recently used tables are kept (see setMaxCachedTables()).
+distanceMap = collections.OrderedDict()
+maxCachedTables = MAX_CACHED_TABLES
+
+# If set, distance tables are also saved in (and loaded from) this directory.
+cacheDir = None
+
+# Layouts with more open positions than this only compute distances as they are used
+# (see setLazyOptions()).
+lazyThreshold = LAZY_THRESHOLD
+lazyMaxBytes = LAZY_MAX_BYTES
+
+# Layouts with more open positions than this use a `LandmarkDistanceTable`
+# (see setLandmarkOptions()).
+landmarkThreshold = LANDMARK_THRESHOLD
+numLandmarks = NUM_LANDMARKS
 
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        self.distancer._distances = getDistanceTable(self.layout)
 
-        self.distancer._distances = self.cache[self.layout.walls]
+def clearDistanceCache():
+    """
+    Forget all the distance tables.
+    Tables are not closed (distancers may still be using them),
+    any file they were loaded from is closed once they are garbage collected.
+    """
 
-def computeDistances(layout):
+    distanceMap.clear()
+
+def getDistanceTable(layout):
     """
-    Runs UCS to all other positions from each position.
+    Get the distance table for a layout.
+    The table is only computed the first time a layout with the same walls is seen.
+    Layouts with more than lazyThreshold open positions get a `LazyDistanceTable`,
+    and layouts with more than landmarkThreshold open positions get a `LandmarkDistanceTable`.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    key = getWallsKey(layout.walls)
+    table = distanceMap.get(key)
+    if (table is not None):
+        distanceMap.move_to_end(key)
+        return table
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    # Huge layouts only compute the distances they need.
+    numPositions = layout.walls.count(False)
+    if (numPositions > landmarkThreshold):
+        table = computeLandmarkDistances(layout)
+        _cacheTable(key, table)
+        return table
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    if (numPositions > lazyThreshold):
+        table = computeLazyDistances(layout)
+        _cacheTable(key, table)
+        return table
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+    table = None
+    if (cacheDir is not None):
+        path = os.path.join(cacheDir, key + CACHE_FILE_EXTENSION)
+        table = loadDistanceTable(path, layout.walls)
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+    if (table is None):
+        table = computeDistances(layout)
+
+        if (cacheDir is not None):
+            saveDistanceTable(path, table)
+
+    _cacheTable(key, table)
+    return table
+
+def getWallsKey(walls):
+    """
+    Get a key that identifies a wall grid.
+    The key only depends on the contents of the grid, so it is the same between runs.
+    """
+
+    text = '%d %d\n%s' % (walls.getWidth(), walls.getHeight(), str(walls))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+def loadDistanceTable(path, walls):
+    """
+    Load a distance table saved by saveDistanceTable().
+    The file is memory mapped instead of read, so loading is quick
+    and processes that load the same table share the same memory.
+    Windows does not allow mapped files to be replaced or deleted,
+    so the file is read into memory there instead.
+    Returns None if the file does not exist or does not match the walls.
+    """
+
+    try:
+        with open(path, 'rb') as file:
+            if (os.name == 'nt'):
+                data = file.read()
+            else:
+                data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    positions = walls.asList(False)
+    numPositions = len(positions)
+
+    if (len(data) != CACHE_FILE_HEADER.size + 2 * numPositions * numPositions):
+        logging.warning("Ignoring distance table with the wrong size: '%s'." % (path))
+        _closeMapping(data)
+        return None
+
+    header = CACHE_FILE_HEADER.unpack_from(data)
+    if (header != (CACHE_FILE_MAGIC, CACHE_FILE_BYTE_ORDER,
+            walls.getWidth(), walls.getHeight(), numPositions)):
+        logging.warning("Ignoring distance table with a bad header: '%s'." % (path))
+        _closeMapping(data)
+        return None
+
+    if (isinstance(data, bytes)):
+        distances = array.array('H')
+        distances.frombytes(data[CACHE_FILE_HEADER.size:])
+        return DistanceTable(walls.getWidth(), walls.getHeight(), positions, distances)
+
+    distances = memoryview(data)[CACHE_FILE_HEADER.size:].cast('H')
+    return DistanceTable(walls.getWidth(), walls.getHeight(), positions, distances,
+            mapping = data)
+
+def precomputeDistances(layout):
+    """
+    Make sure the distances for a layout are computed before any agent asks for them.
+    Games call this before agents are registered so that the computation does not count
+    against any agent's startup time.
+    """
+
+    getDistanceTable(layout)
+
+def saveDistanceTable(path, table):
+    """
+    Save a distance table so that it can be loaded with loadDistanceTable().
+    The file is written in native byte order (so it can be mapped directly into memory),
+    and is moved into place all at once so other processes never see a partial file.
+    """
+
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+
+        with open(tempPath, 'wb') as file:
+            file.write(CACHE_FILE_HEADER.pack(CACHE_FILE_MAGIC, CACHE_FILE_BYTE_ORDER,
+                    table._width, table._height, table._numPositions))
+            file.write(table._distances)
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Could not save distance table to '%s': %s" % (path, ex))
+
+        if (os.path.exists(tempPath)):
+            os.remove(tempPath)
+
+def setCacheDir(path):
+    """
+    Set the directory that distance tables are saved in and loaded from.
+    Use None to keep tables in memory only (the default).
+    """
+
+    global cacheDir
+    cacheDir = path
+
+def setLandmarkOptions(threshold = LANDMARK_THRESHOLD, landmarks = NUM_LANDMARKS):
+    """
+    Set when landmarks are used instead of a distance table
+    (layouts with more than threshold open positions), and how many landmarks to use.
+    This only affects tables that have not been computed yet.
+    """
+
+    global landmarkThreshold, numLandmarks
+    landmarkThreshold = threshold
+    numLandmarks = landmarks
+
+def setLazyOptions(threshold = LAZY_THRESHOLD, maxBytes = LAZY_MAX_BYTES):
+    """
+    Set when distance tables are computed lazily (layouts with more than threshold open positions),
+    and how much memory lazy tables can use to keep rows around.
+    This only affects tables that have not been computed yet.
+    """
+
+    global lazyThreshold, lazyMaxBytes
+    lazyThreshold = threshold
+    lazyMaxBytes = maxBytes
+
+def setMaxCachedTables(maxTables = MAX_CACHED_TABLES):
+    """
+    Set how many distance tables are kept in memory for reuse.
+    Tables that are still being used by a distancer are not affected.
+    """
+
+    global maxCachedTables
+    maxCachedTables = maxTables
+
+    _evictTables()
+
+class DistanceTable(object):
+    """
+    The maze distances between every pair of open positions in a layout.
+
+    Open positions are numbered densely (in the same order as `Grid.asList`),
+    and the distances are kept in a single flat array of unsigned shorts
+    where the distance between positions i and j is at `i * numPositions + j`.
+    Tables are never modified after they are built, so they can be shared.
+    """
+
+    def __init__(self, width, height, positions, distances, mapping = None):
+        self._width = width
+        self._height = height
+        self._positions = positions
+        self._numPositions = len(positions)
+        self._distances = distances
+
+        # The memory mapped file that the distances are in (see loadDistanceTable()).
+        self._mapping = mapping
+
+        # Map cell indexes (x * height + y) to position indexes, walls are -1.
+        self._indexes = [-1] * (width * height)
+        for index, (x, y) in enumerate(positions):
+            self._indexes[x * height + y] = index
+
+    def close(self):
+        """
+        Release the file that the table was loaded from (if any).
+        The table cannot be used after it is closed,
+        so every `Distancer` using it (see getDistanceTable()) has to be discarded first.
+        """
+
+        if (self._mapping is None):
+            return
+
+        try:
+            self._distances.release()
+        except BufferError:
+            pass
+
+        self._distances = None
+
+        _closeMapping(self._mapping)
+        self._mapping = None
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+    def getDistanceOnGrid(self, pos1, pos2):
+        distance = self._distances[self.getIndex(pos1) * self._numPositions + self.getIndex(pos2)]
+        if (distance == UNREACHABLE):
+            return sys.maxsize
+
+        return distance
+
+    def getLowerBound(self, pos1, pos2):
+        """
+        Get a distance that is no more than the real distance between two grid positions.
+        This is meant for heuristics, and can be a lot faster than getDistanceOnGrid()
+        for tables that do not keep every distance.
+        """
+
+        return self.getDistanceOnGrid(pos1, pos2)
+
+    def getRow(self, index):
+        """
+        Get the distances from the position with the given (dense) index to every position.
+        The returned row is read-only.
+        """
+
+        start = index * self._numPositions
+        return memoryview(self._distances)[start:(start + self._numPositions)]
+
+    def getIndex(self, position):
+        """
+        Get the dense index of an open grid position.
+        """
+
+        x, y = position
+        x = int(x)
+        y = int(y)
+
+        index = -1
+        if (x >= 0 and x < self._width and y >= 0 and y < self._height):
+            index = self._indexes[x * self._height + y]
+
+        if (index == -1):
+            raise Exception("Position not in grid: " + str(position))
+
+        return index
+
+    def getNumPositions(self):
+        return self._numPositions
+
+    def getPositions(self):
+        return self._positions
+
+class LazyDistanceTable(DistanceTable):
+    """
+    A `DistanceTable` for layouts that are too big to compute every distance up front.
+    The distances from a position (a row) are computed with BFS the first time they are needed,
+    and the most recently used rows are kept in a cache that uses at most maxBytes.
+    """
+
+    def __init__(self, width, height, positions, adjacency, maxBytes):
+        super().__init__(width, height, positions, None)
+
+        self._adjacency = adjacency
+        self._maxRows = max(1, maxBytes // (ROW_ITEM_BYTES * max(1, self._numPositions)))
+        self._rows = collections.OrderedDict()
+
+    # Override
+    def getDistanceOnGrid(self, pos1, pos2):
+        index1 = self.getIndex(pos1)
+        index2 = self.getIndex(pos2)
+
+        # Distances are symmetric, so use whichever row is already around.
+        if (index1 not in self._rows and index2 in self._rows):
+            index1, index2 = index2, index1
+
+        distance = self.getRow(index1)[index2]
+        if (distance == UNREACHABLE):
+            return sys.maxsize
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+        return distance
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    # Override
+    def getRow(self, index):
+        row = self._rows.get(index)
+        if (row is not None):
+            self._rows.move_to_end(index)
+            return row
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+        row = array.array('H', _computeRow(self._adjacency, index))
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        self._rows[index] = row
+        if (len(self._rows) > self._maxRows):
+            self._rows.popitem(last = False)
 
-            for other in adjacent:
-                if other not in dist:
+        return row
+
+class LandmarkDistanceTable(LazyDistanceTable):
+    """
+    A `DistanceTable` for layouts that are too big to keep even some of the table around.
+    Only the distances from a few landmark positions are kept (O(landmarks * positions) memory).
+
+    By the triangle inequality, the difference between the distances from a landmark to two
+    positions is a lower bound on the distance between those positions.
+    The best of these bounds is a consistent heuristic that an A* search uses
+    to get exact distances.
+
+    Landmarks are chosen to be spread out:
+    each one is the position that is furthest from all the landmarks chosen before it.
+
+    Full rows (see getRow()) are cached the same way as a `LazyDistanceTable`,
+    and are used for distances whenever they are around.
+    """
+
+    def __init__(self, width, height, positions, adjacency, numLandmarks, maxBytes):
+        super().__init__(width, height, positions, adjacency, maxBytes)
+
+        self._landmarks = []
+        self._landmarkRows = []
+
+        if (self._numPositions == 0):
+            return
+
+        # Start as far away as possible from some arbitrary position.
+        closest = _computeRow(adjacency, 0)
+        landmark = max(range(self._numPositions), key = closest.__getitem__)
+
+        for i in range(min(numLandmarks, self._numPositions)):
+            row = _computeRow(adjacency, landmark)
+
+            self._landmarks.append(landmark)
+            self._landmarkRows.append(array.array('H', row))
+
+            closest = [min(pair) for pair in zip(closest, row)]
+            landmark = max(range(self._numPositions), key = closest.__getitem__)
+
+            # Every position is a landmark.
+            if (closest[landmark] == 0):
+                break
+
+    # Override
+    def getDistanceOnGrid(self, pos1, pos2):
+        index1 = self.getIndex(pos1)
+        index2 = self.getIndex(pos2)
+
+        # Distances are symmetric, so use whichever row is already around.
+        for (source, target) in [(index1, index2), (index2, index1)]:
+            row = self._rows.get(source)
+            if (row is not None):
+                distance = row[target]
+                if (distance == UNREACHABLE):
+                    return sys.maxsize
+
+                return distance
+
+        return self._search(index1, index2)
+
+    def getLandmarks(self):
+        return [self._positions[landmark] for landmark in self._landmarks]
+
+    # Override
+    def getLowerBound(self, pos1, pos2):
+        return self._getLowerBound(self.getIndex(pos1), self.getIndex(pos2))
+
+    def _getLowerBound(self, index1, index2):
+        bound = 0
+
+        for row in self._landmarkRows:
+            distance1 = row[index1]
+            distance2 = row[index2]
+
+            # Only one of the positions can reach the landmark.
+            if ((distance1 == UNREACHABLE) != (distance2 == UNREACHABLE)):
+                return sys.maxsize
+
+            bound = max(bound, abs(distance1 - distance2))
+
+        return bound
+
+    def _search(self, source, target):
+        """
+        A* from source to target, guided by the landmark lower bounds.
+        """
+
+        if (self._getLowerBound(source, target) == sys.maxsize):
+            return sys.maxsize
+
+        # The heuristic only ever looks at the target's landmark distances.
+        targetDistances = [(row, row[target]) for row in self._landmarkRows]
+
+        def heuristic(index):
+            return max([abs(row[index] - distance) for (row, distance) in targetDistances],
+                    default = 0)
+
+        costs = {source: 0}
+        closed = set()
+        fringe = [(heuristic(source), 0, source)]
+
+        while (len(fringe) > 0):
+            (priority, cost, node) = heapq.heappop(fringe)
+            if (node == target):
+                return cost
+
+            if (node in closed):
+                continue
+
+            closed.add(node)
+
+            for neighbor in self._adjacency[node]:
+                neighborCost = cost + 1
+                if (neighbor in closed or neighborCost >= costs.get(neighbor, sys.maxsize)):
                     continue
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+                costs[neighbor] = neighborCost
+                heapq.heappush(fringe, (neighborCost + heuristic(neighbor), neighborCost, neighbor))
+
+        return sys.maxsize
+
+def computeDistances(layout):
+    """
+    Runs BFS to all other positions from each position.
+    """
+
+    walls = layout.walls
+    positions = walls.asList(False)
+    adjacency = _buildAdjacency(positions)
+
+    distances = array.array('H')
+    for source in range(len(positions)):
+        distances.extend(_computeRow(adjacency, source))
+
+    return DistanceTable(walls.getWidth(), walls.getHeight(), positions, distances)
+
+def computeLazyDistances(layout, maxBytes = None):
+    """
+    Get a `LazyDistanceTable` for a layout.
+    This is quick, since no distances are computed until they are asked for.
+    """
+
+    if (maxBytes is None):
+        maxBytes = lazyMaxBytes
+
+    walls = layout.walls
+    positions = walls.asList(False)
+
+    return LazyDistanceTable(walls.getWidth(), walls.getHeight(), positions,
+            _buildAdjacency(positions), maxBytes)
+
+def computeLandmarkDistances(layout, landmarks = None, maxBytes = None):
+    """
+    Get a `LandmarkDistanceTable` for a layout.
+    This only runs one BFS per landmark.
+    """
+
+    if (landmarks is None):
+        landmarks = numLandmarks
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+    if (maxBytes is None):
+        maxBytes = lazyMaxBytes
 
-    return distances
+    walls = layout.walls
+    positions = walls.asList(False)
+
+    return LandmarkDistanceTable(walls.getWidth(), walls.getHeight(), positions,
+            _buildAdjacency(positions), landmarks, maxBytes)
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    try:
+        return distances.getDistanceOnGrid(pos1, pos2)
+    except Exception:
+        return DEFAULT_DISTANCE
+
+def _buildAdjacency(positions):
+    """
+    Get the (dense) indexes of the open neighbors of each position.
+    """
+
+    # Longer distances would not fit in (or would be mistaken for UNREACHABLE in) a row.
+    if (len(positions) >= UNREACHABLE):
+        raise ValueError("Cannot compute distances for %d open positions, the limit is %d." %
+                (len(positions), UNREACHABLE - 1))
+
+    indexes = {position: index for index, position in enumerate(positions)}
+
+    adjacency = []
+    for (x, y) in positions:
+        neighbors = []
+        for neighbor in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if (neighbor in indexes):
+                neighbors.append(indexes[neighbor])
+
+        adjacency.append(neighbors)
+
+    return adjacency
+
+def _cacheTable(key, table):
+    """
+    Keep a table for reuse, and forget the least recently used tables that no longer fit.
+    """
+
+    distanceMap[key] = table
+    _evictTables()
+
+def _closeMapping(data):
+    if (not isinstance(data, mmap.mmap)):
+        return
+
+    try:
+        data.close()
+    except BufferError:
+        # Someone is still holding a row, the mapping is closed once they let go of it.
+        logging.debug("Distance table rows are still in use, not closing the mapping yet.")
+
+def _computeRow(adjacency, source):
+    """
+    Run BFS from a single position, and return the distance to every position.
+    """
+
+    row = [UNREACHABLE] * len(adjacency)
+    row[source] = 0
+
+    # Every edge costs the same, so expand a whole layer at a time.
+    frontier = [source]
+    distance = 0
+
+    while (len(frontier) > 0):
+        distance += 1
+        nextFrontier = []
+
+        for node in frontier:
+            for neighbor in adjacency[node]:
+                if (row[neighbor] == UNREACHABLE):
+                    row[neighbor] = distance
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return row
+
+def _evictTables():
+    """
+    Forget the least recently used tables until the cache fits in maxCachedTables.
+    """
 
-    return DEFAULT_DISTANCE
+    while (len(distanceMap) > max(0, maxCachedTables)):
+        distanceMap.popitem(last = False)
@@ -1,5 +1,4 @@
 import abc
-import copy
 
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
@@ -15,6 +14,13 @@ class AbstractGameState(abc.ABC):
     Only use the accessor methods to get data about the game state.
     """
 
+    # Search can create a huge number of states, so keep them small.
+    # Children should declare their own (additional) slots.
+    __slots__ = ('_lastAgentMoved', '_gameover', '_win', '_layout', '_hash', '_boardHash',
+            '_foodCopied', '_food', '_lastFoodEaten', '_foodPositions', '_foodView',
+            '_capsulesCopied', '_capsules', '_lastCapsuleEaten', '_highlightLocations',
+            '_agentStatesCopied', '_agentStates', '_score')
+
     def __init__(self, layout):
         self._lastAgentMoved = None
         self._gameover = False
@@ -22,10 +28,15 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
+        # Keep a copy of the hash.
         # Any children should be sure to clear the hash when modifications are made.
         self._hash = None
 
+        # A Zobrist hash of the food and capsules left on the board.
+        # This is updated as food and capsules are eaten,
+        # so hashing a state never has to look at the whole board.
+        self._boardHash = 0
+
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
 
@@ -33,6 +44,15 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # The positions of the remaining food, kept alongside the grid so that
+        # counting and listing food does not need to look at the whole board.
+        # This is copied on write along with the food grid.
+        self._foodPositions = set(self._food.asList())
+
+        # A read-only view of the food that is handed out by getFood().
+        # Since the view is immutable, it can be shared until the food changes.
+        self._foodView = None
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -45,8 +65,19 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Agent states are also copied on write, but individually.
+        # This is a bitmask of the agent indexes whose state this state has its own copy of.
+        self._agentStatesCopied = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
+        foodKeys, capsuleKeys = layout.getHashKeys()
+        for (x, y) in self._food.asList():
+            self._boardHash ^= foodKeys[layout.getCellIndex(x, y)]
+
+        for (x, y) in self._capsules:
+            self._boardHash ^= capsuleKeys[layout.getCellIndex(x, y)]
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -64,10 +95,53 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action, validate = True):
+        """
+        Apply the action to the context state (self).
+        If validate is false, then the action is trusted to be legal.
+        """
+
+        pass
+
     def addScore(self, score):
         self._hash = None
         self._score += score
 
+    def applyMove(self, agentIndex, action, validate = True):
+        """
+        Apply an action to this state in place (instead of making a successor).
+        Returns an undo record that can be passed to undoMove() to get this state back
+        exactly as it was.
+
+        If validate is false, then the action is trusted to be legal
+        and this state is trusted to not be terminal (see generateSuccessorUnchecked()).
+
+        This allows a search to walk a tree using a single state:
+        ```
+        record = state.applyMove(agentIndex, action)
+        value = search(state)
+        state.undoMove(record)
+        ```
+        Moves must be undone in the reverse order that they were applied.
+        """
+
+        # Check that successors exist.
+        if (validate and self.isOver()):
+            raise RuntimeError("Can't apply a move to a terminal state.")
+
+        record = self._saveUndoFields()
+
+        # Anything the move changes must be copied first, so the record keeps the old version.
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._agentStatesCopied = 0
+        self._agentStates = self._agentStates.copy()
+
+        self._applySuccessorAction(agentIndex, action, validate)
+
+        return record
+
     def eatCapsule(self, x, y):
         """
         Mark the capsule at the given location as eaten.
@@ -83,6 +157,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
+        self._boardHash ^= self._layout.getHashKeys()[1][self._layout.getCellIndex(x, y)]
         self._hash = None
         return True
 
@@ -96,11 +171,15 @@ class AbstractGameState(abc.ABC):
 
         if (not self._foodCopied):
             self._food = self._food.copy()
+            self._foodPositions = self._foodPositions.copy()
             self._foodCopied = True
 
-        self._food[x][y] = False
+        self._food.set(x, y, False)
+        self._foodPositions.remove((x, y))
+        self._foodView = None
         self._lastFoodEaten = (x, y)
 
+        self._boardHash ^= self._layout.getHashKeys()[0][self._layout.getCellIndex(x, y)]
         self._hash = None
         return True
 
@@ -110,6 +189,80 @@ class AbstractGameState(abc.ABC):
 
         self._hash = None
 
+    def generateGridSuccessor(self, agentIndex, action, validate = True):
+        """
+        Returns the successor state after the specified agent keeps taking the action
+        until it reaches a grid position (agents that move at half speed can end up between
+        grid positions).
+        No other agents move in the meantime, and every step applies the normal rules
+        (eating, collisions, timers) without building a state for each step.
+        If validate is false, then the action is trusted to be legal
+        and this state is trusted to not be terminal (see generateSuccessorUnchecked()).
+        Raises a ValueError if the action leaves the agent between grid positions
+        without moving it any further (e.g. STOP).
+        """
+
+        if (validate and self.isOver()):
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        successor = self._initSuccessor()
+        successor._applySuccessorAction(agentIndex, action, validate)
+
+        # Once the first step is taken, the agent can only keep going in the same direction.
+        position = successor.getAgentState(agentIndex).getPosition()
+        while (not successor.isOver() and position is not None
+                and position != util.nearestPoint(position)):
+            if (action == Directions.STOP):
+                raise ValueError("Agent %d cannot reach a grid position by stopping." %
+                        (agentIndex))
+
+            successor._applySuccessorAction(agentIndex, action, False)
+
+            previousPosition = position
+            position = successor.getAgentState(agentIndex).getPosition()
+            if (position == previousPosition):
+                raise ValueError("Action %s does not move agent %d to a grid position." %
+                        (action, agentIndex))
+
+        return successor
+
+    def generateSuccessorUnchecked(self, agentIndex, action):
+        """
+        Same as generateSuccessor(), but trusts the caller instead of checking
+        that the action is legal and that this state is not terminal.
+        Only use this with actions that came from getLegalActions() on this state
+        (like most searches do), otherwise the result is undefined.
+        """
+
+        successor = self._initSuccessor()
+        successor._applySuccessorAction(agentIndex, action, False)
+
+        return successor
+
+    def generateSuccessors(self, agentIndex, includeStop = True):
+        """
+        Get the successors for every legal action the agent can take, as a list of
+        (action, successor) tuples (in the same order as getLegalActions()).
+        This is the same as calling generateSuccessor() for each legal action,
+        but the legality and terminal checks are only done once
+        and the successors share any storage they did not change.
+
+        Many agents ignore `pacai.core.directions.Directions.STOP`,
+        so includeStop can be used to skip it.
+        """
+
+        successors = []
+
+        for action in self.getLegalActions(agentIndex):
+            if (not includeStop and action == Directions.STOP):
+                continue
+
+            successor = self._initSuccessor()
+            successor._applySuccessorAction(agentIndex, action, False)
+            successors.append((action, successor))
+
+        return successors
+
     def getAgentPosition(self, index):
         """
         Returns a location tuple of the agent with the given index.
@@ -130,6 +283,22 @@ class AbstractGameState(abc.ABC):
     def getAgentStates(self):
         return self._agentStates
 
+    def getMutableAgentState(self, index):
+        """
+        Get the state for an agent that is about to be modified (e.g. by the game rules).
+        Agent states can be shared between a state and its successors,
+        so this will make sure that the agent state belongs only to this game state first.
+
+        Agents should use getAgentState() instead.
+        """
+
+        if (not (self._agentStatesCopied >> index) & 1):
+            self._agentStates[index] = self._agentStates[index].copy()
+            self._agentStatesCopied |= (1 << index)
+
+        self._hash = None
+        return self._agentStates[index]
+
     def getCapsules(self):
         """
         Returns a list of positions (x, y) of the remaining capsules.
@@ -139,16 +308,38 @@ class AbstractGameState(abc.ABC):
 
     def getFood(self):
         """
-        Returns a Grid of boolean food indicator variables.
+        Returns a read-only Grid of boolean food indicator variables
+        (a `pacai.core.grid.FrozenBitGrid`).
 
         Grids can be accessed via list notation.
         So to check if there is food at (x, y), just do something like: food[x][y].
 
-        Callers should favor hasFood() over this, since this will make a copy of the grid.
+        The returned grid cannot be modified,
+        callers that need to modify the food should use getFoodCopy() instead.
+        """
+
+        if (self._foodView is None):
+            self._foodView = self._food.freeze()
+
+        return self._foodView
+
+    def getFoodCopy(self):
+        """
+        Returns a copy of the food Grid that the caller is free to modify.
         """
 
         return self._food.copy()
 
+    def getFoodPositions(self):
+        """
+        Returns a set of positions (x, y) of the remaining food.
+        This is cheaper than getFood().asList(), but the positions are not in any particular order.
+
+        The caller should not modify the set.
+        """
+
+        return self._foodPositions
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
@@ -188,7 +379,7 @@ class AbstractGameState(abc.ABC):
         Get the amount of food left on the board.
         """
 
-        return self._food.count()
+        return len(self._foodPositions)
 
     def getScore(self):
         return self._score
@@ -217,14 +408,14 @@ class AbstractGameState(abc.ABC):
         Returns true if the location (x, y) has food.
         """
 
-        return self._food[x][y]
+        return self._food.get(x, y)
 
     def hasWall(self, x, y):
         """
         Returns true if (x, y) has a wall, false otherwise.
         """
 
-        return self._layout.walls[x][y]
+        return self._layout.walls.get(x, y)
 
     def isLose(self):
         return self.isOver() and not self._win
@@ -242,25 +433,90 @@ class AbstractGameState(abc.ABC):
         self._score = score
         self._hash = None
 
-    def _initSuccessor(self):
+    def undoMove(self, record):
         """
-        Get a state that will eventually serve as a successor.
-        Initialize the successor to look like this state.
+        Undo a move made by applyMove().
+        """
+
+        self._restoreUndoFields(record)
+
+    def _cloneInto(self, successor):
+        """
+        Copy the fields of this state into a new (uninitialized) state.
+        Children with their own fields should override this (and call super).
+        Any mutable field that is shared must be copied on write.
         """
 
-        # Start with a shallow copy.
-        successor = copy.copy(self)
+        successor._lastAgentMoved = self._lastAgentMoved
+        successor._gameover = self._gameover
+        successor._win = self._win
+        successor._layout = self._layout
         successor._hash = None
+        successor._boardHash = self._boardHash
 
-        # Leave food and capsules as a shallow copy, but mark them to be copied on write.
         successor._foodCopied = False
+        successor._food = self._food
+        successor._lastFoodEaten = self._lastFoodEaten
+        successor._foodPositions = self._foodPositions
+        successor._foodView = self._foodView
+
         successor._capsulesCopied = False
+        successor._capsules = self._capsules
+        successor._lastCapsuleEaten = self._lastCapsuleEaten
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        successor._highlightLocations = self._highlightLocations
+
+        # Only the list is copied, the agent states themselves are copied on write.
+        successor._agentStatesCopied = 0
+        successor._agentStates = self._agentStates.copy()
+
+        successor._score = self._score
+
+    def _initSuccessor(self):
+        """
+        Get a state that will eventually serve as a successor.
+        Initialize the successor to look like this state.
+        """
+
+        # Skip __init__(), all the fields will be copied over.
+        successor = self.__class__.__new__(self.__class__)
+        self._cloneInto(successor)
+
+        # Everything is now shared with the successor,
+        # so this state also needs to copy before it writes.
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._agentStatesCopied = 0
 
         return successor
 
+    def _restoreUndoFields(self, fields):
+        """
+        Restore the fields saved by _saveUndoFields().
+        """
+
+        (self._lastAgentMoved, self._gameover, self._win, self._hash, self._boardHash,
+                self._food, self._lastFoodEaten, self._foodPositions, self._foodView,
+                self._capsules, self._lastCapsuleEaten, self._agentStates, self._score) = fields
+
+        # Successors made while the move was applied may share any of the restored fields,
+        # so this state has to copy before it writes (like in _initSuccessor()).
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._agentStatesCopied = 0
+
+    def _saveUndoFields(self):
+        """
+        Get all the fields that a move can change, so they can be put back by
+        _restoreUndoFields().
+        Mutable fields are saved by reference, so they must be copied on write.
+        Children with their own fields should override both methods (and call super).
+        """
+
+        return (self._lastAgentMoved, self._gameover, self._win, self._hash, self._boardHash,
+                self._food, self._lastFoodEaten, self._foodPositions, self._foodView,
+                self._capsules, self._lastCapsuleEaten, self._agentStates, self._score)
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -288,8 +544,11 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
+        # The food and capsules are already hashed (see _boardHash),
+        # and agent states cache their own hash.
+        # So, this is constant with respect to the size of the board.
         if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+            self._hash = util.buildHash(self._score, self._gameover, self._win, self._boardHash,
+                *self._agentStates)
 
         return self._hash
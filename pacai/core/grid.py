@@ -34,12 +34,28 @@ class Grid:
     def deepCopy(self):
         return self.copy()
 
+    def get(self, x, y):
+        """
+        Get the value at (x, y).
+        Equivalent to grid[x][y].
+        """
+
+        return self._data[x][y]
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y).
+        Equivalent to grid[x][y] = value.
+        """
+
+        self._data[x][y] = value
+
     def shallowCopy(self):
         grid = Grid(self._width, self._height)
         grid._data = self._data
@@ -55,6 +71,9 @@ class Grid:
         if (other is None):
             return False
 
+        if (isinstance(other, BitGrid)):
+            return other == self
+
         return self._data == other._data
 
     def __getitem__(self, i):
@@ -82,3 +101,235 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class BitGrid(object):
+    """
+    A 2-dimensional array of booleans backed by the bits of a single Python int.
+    This has the same interface as `Grid` (including grid[x][y] access),
+    but copies, equality checks, hashing, and counting do not have to loop over every cell.
+
+    Cell (x, y) is stored in bit (x * height + y).
+    This is the same order that `Grid.__hash__` uses,
+    so a `BitGrid` and a `Grid` with the same contents will have the same hash.
+    """
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = self._fullMask()
+
+        # Column views are only built when grid[x] is first used.
+        self._columns = None
+
+    def asList(self, key = True):
+        bits = self._bits
+        if (not key):
+            bits ^= self._fullMask()
+
+        values = []
+        while (bits):
+            lowBit = bits & -bits
+            values.append(self._cellIndexToPosition(lowBit.bit_length() - 1))
+            bits ^= lowBit
+
+        return values
+
+    def copy(self):
+        # Ints are immutable, so the copy can share the bits.
+        grid = BitGrid(self._width, self._height)
+        grid._bits = self._bits
+        return grid
+
+    def count(self, item = True):
+        trueCount = bin(self._bits).count('1')
+        if (item):
+            return trueCount
+
+        return self._width * self._height - trueCount
+
+    def deepCopy(self):
+        return self.copy()
+
+    def freeze(self):
+        """
+        Get a read-only version of this grid that shares the same storage.
+        Since the storage is an immutable int, this is constant time
+        and later changes to this grid will not show up in the frozen one.
+        """
+
+        grid = FrozenBitGrid(self._width, self._height)
+        grid._bits = self._bits
+        return grid
+
+    @staticmethod
+    def fromBytes(width, height, data):
+        """
+        Make a grid from the bytes returned by `BitGrid.toBytes`.
+        """
+
+        grid = BitGrid(width, height)
+        grid._bits = int.from_bytes(data, 'little') & grid._fullMask()
+        return grid
+
+    def get(self, x, y):
+        """
+        Get the value at (x, y).
+        Equivalent to grid[x][y], but does not go through a column view.
+        Like `Grid`, negative indexes count from the end and others raise an IndexError.
+        """
+
+        return ((self._bits >> self._getBitIndex(x, y)) & 1) == 1
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y).
+        Equivalent to grid[x][y] = value, but does not go through a column view.
+        Like `Grid`, negative indexes count from the end and others raise an IndexError.
+        """
+
+        bit = 1 << self._getBitIndex(x, y)
+        if (value):
+            self._bits |= bit
+        else:
+            self._bits &= ~bit
+
+    def shallowCopy(self):
+        """
+        Unlike `Grid.shallowCopy`, the copy does not see later changes to this grid
+        (the bits are an immutable int, so there is no storage to share).
+        This is the same as copy().
+        """
+
+        return self.copy()
+
+    def toBytes(self):
+        """
+        Get the contents of the grid as bytes (one bit per cell, little endian).
+        See `BitGrid.fromBytes`.
+        """
+
+        return self._bits.to_bytes((self._width * self._height + 7) // 8, 'little')
+
+    def _cellIndexToPosition(self, index):
+        return divmod(index, self._height)
+
+    def _getBitIndex(self, x, y):
+        if (x < 0):
+            x += self._width
+
+        if (y < 0):
+            y += self._height
+
+        if (x < 0 or x >= self._width):
+            raise IndexError('Grid column index out of range: %d.' % (x))
+
+        if (y < 0 or y >= self._height):
+            raise IndexError('Grid row index out of range: %d.' % (y))
+
+        return x * self._height + y
+
+    def _fullMask(self):
+        return (1 << (self._width * self._height)) - 1
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, BitGrid)):
+            return (self._bits == other._bits
+                    and self._width == other._width
+                    and self._height == other._height)
+
+        if (self._width != other.getWidth() or self._height != other.getHeight()):
+            return False
+
+        return self.asList() == other.asList()
+
+    def __getitem__(self, x):
+        if (self._columns is None):
+            self._columns = [_BitGridColumn(self, column) for column in range(self._width)]
+
+        return self._columns[x]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_columns'] = None
+        return state
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        for y in range(self._height):
+            self.set(x, y, column[y])
+
+    def __str__(self):
+        out = [['FT'[self.get(x, y)] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class FrozenBitGrid(BitGrid):
+    """
+    A read-only `BitGrid`, see `BitGrid.freeze`.
+    Any attempt to modify the grid will raise a TypeError.
+    Use copy() to get a grid that can be modified.
+    """
+
+    def freeze(self):
+        return self
+
+    def set(self, x, y, value):
+        raise TypeError('Frozen grids cannot be modified, make a copy first.')
+
+    def __setitem__(self, x, column):
+        raise TypeError('Frozen grids cannot be modified, make a copy first.')
+
+class _BitGridColumn(object):
+    """
+    A single column (fixed x) of a `BitGrid`.
+    Exists so that grid[x][y] works the same as it does for a `Grid`.
+    """
+
+    __slots__ = ('_grid', '_x', '_offset', '_height')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+        self._height = grid._height
+        self._offset = x * grid._height
+
+    def __getitem__(self, y):
+        if (y < 0):
+            y += self._height
+
+        if (y < 0 or y >= self._height):
+            raise IndexError('Grid row index out of range: %d.' % (y))
+
+        return ((self._grid._bits >> (self._offset + y)) & 1) == 1
+
+    def __len__(self):
+        return self._height
+
+    def __setitem__(self, y, value):
+        if (y < 0):
+            y += self._height
+
+        if (y < 0 or y >= self._height):
+            raise IndexError('Grid row index out of range: %d.' % (y))
+
+        self._grid.set(self._x, y, value)
@@ -0,0 +1,166 @@
+"""
+Most layouts are long corridors that connect a few junctions.
+A `JunctionGraph` contracts each corridor into a single weighted edge,
+so a search only needs to look at the junctions (and dead ends).
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+class JunctionEdge(object):
+    """
+    A corridor between two nodes of a `JunctionGraph`.
+    An edge has a direction (start to end), but can be traveled both ways.
+    """
+
+    __slots__ = ('start', 'end', 'cells', 'actions', 'cost')
+
+    def __init__(self, cells, actions):
+        # All the cells along the edge (including the start and end nodes).
+        self.cells = tuple(cells)
+
+        # The actions that take an agent from the start to the end.
+        self.actions = tuple(actions)
+
+        self.start = self.cells[0]
+        self.end = self.cells[-1]
+        self.cost = len(self.actions)
+
+    def getActions(self, fromOffset, toOffset):
+        """
+        Get the actions that move along this edge from one offset (number of steps from the start)
+        to another.
+        """
+
+        if (fromOffset <= toOffset):
+            return self.actions[fromOffset:toOffset]
+
+        return tuple(Actions.reverseDirection(action)
+                for action in reversed(self.actions[toOffset:fromOffset]))
+
+    def __repr__(self):
+        return 'JunctionEdge(%s -> %s, %d)' % (self.start, self.end, self.cost)
+
+class JunctionGraph(object):
+    """
+    A graph where the nodes are the open cells that are not in the middle of a corridor
+    (cells that do not have exactly two open neighbors)
+    and the edges are the corridors between them.
+
+    Every open cell is somewhere along an edge,
+    see `JunctionGraph.getLocations` for mapping cells to edges.
+    """
+
+    def __init__(self, walls):
+        self._nodes = []
+        self._edges = []
+
+        # {position: [(edge, offset), ...], ...}
+        self._locations = {}
+
+        # {node: [(neighbor node, actions, cost), ...], ...}
+        self._neighbors = {}
+
+        openCells = walls.asList(False)
+
+        # {position: [(direction, neighbor position), ...], ...}
+        moves = {}
+        for (x, y) in openCells:
+            moves[(x, y)] = []
+
+            for direction in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(direction)
+                neighbor = (x + int(dx), y + int(dy))
+
+                if (neighbor[0] < 0 or neighbor[0] >= walls.getWidth()
+                        or neighbor[1] < 0 or neighbor[1] >= walls.getHeight()):
+                    continue
+
+                if (not walls.get(*neighbor)):
+                    moves[(x, y)].append((direction, neighbor))
+
+        nodes = set([cell for cell in openCells if len(moves[cell]) != 2])
+        for cell in openCells:
+            if (cell in nodes):
+                self._addNode(cell, nodes, moves)
+
+        # Loops without any junctions still need a node.
+        for cell in openCells:
+            if (cell not in self._locations):
+                nodes.add(cell)
+                self._addNode(cell, nodes, moves)
+
+        for node in self._nodes:
+            self._neighbors[node] = []
+
+        for edge in self._edges:
+            self._neighbors[edge.start].append((edge.end, edge.actions, edge.cost))
+            self._neighbors[edge.end].append((edge.start, edge.getActions(edge.cost, 0), edge.cost))
+
+    def getEdges(self):
+        return self._edges
+
+    def getLocations(self, position):
+        """
+        Get where a cell is in the graph, as a list of (edge, offset) tuples,
+        where offset is the number of steps from the start of the edge.
+        Cells in a corridor are on exactly one edge.
+        Nodes are the start or end of every edge that touches them
+        (and are not on any edge if they have no open neighbors).
+        """
+
+        return self._locations[position]
+
+    def getNeighbors(self, node):
+        """
+        Get the nodes that are connected to a node, as a list of
+        (neighbor node, actions to get there, cost) tuples.
+        """
+
+        return self._neighbors[node]
+
+    def getNodes(self):
+        return self._nodes
+
+    def isNode(self, position):
+        return position in self._neighbors
+
+    def _addNode(self, node, nodes, moves):
+        """
+        Add a node and follow all the corridors that leave it.
+        Corridors are only followed from their first end that gets added,
+        afterwards the edge is already in the graph.
+        """
+
+        self._nodes.append(node)
+        self._locations.setdefault(node, [])
+
+        for (direction, nextCell) in moves[node]:
+            # Make sure this edge was not already followed from the other side.
+            if (any(edge.cells[-2] == nextCell for (edge, offset) in self._locations[node]
+                    if edge.end == node)):
+                continue
+
+            cells = [node]
+            actions = [direction]
+            cell = nextCell
+
+            while (cell not in nodes):
+                # Corridor cells have exactly two neighbors, keep going away from the last one.
+                previous = cells[-1]
+                cells.append(cell)
+
+                for (step, stepCell) in moves[cell]:
+                    if (stepCell != previous):
+                        break
+
+                actions.append(step)
+                cell = stepCell
+
+            cells.append(cell)
+
+            edge = JunctionEdge(cells, actions)
+            self._edges.append(edge)
+
+            for offset in range(len(edge.cells)):
+                self._locations.setdefault(edge.cells[offset], []).append((edge, offset))
@@ -1,14 +1,43 @@
+import logging
 import os
 import random
+import struct
 
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
-from pacai.core.grid import Grid
+from pacai.core.grid import BitGrid
+from pacai.core.junctionGraph import JunctionGraph
+from pacai.core.layoutAnalysis import LayoutAnalysis
+from pacai.util.util import nearestPoint
 
 # By default, the layout directory is adjacent to this file.
 DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'layouts')
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# The order that moves are listed in (the same as `pacai.core.actions.Actions`).
+MOVE_DIRECTIONS = sorted(Directions.CARDINAL + [Directions.STOP])
+
+# The keys used for Zobrist hashing are random, but should be the same between runs.
+HASH_KEY_SEED = 4
+
+HASH_KEY_BITS = 64
+
+# Compiled layouts can be saved next to the layout file (see setUseSidecars()).
+# A sidecar is a header (magic, the layout file's modification time and size,
+# width, height, number of capsules, number of agents) followed by
+# the walls, food, capsules, agents, possible moves for each cell, and the layout text.
+SIDECAR_EXTENSION = '.layc'
+SIDECAR_HEADER = struct.Struct('=8sqqIIII')
+SIDECAR_MAGIC = b'PACLAYC1'
+
+# Layouts that have already been loaded, see getLayout().
+# {path: (file stamp, layout, agent characters), ...}
+_layoutCache = {}
+
+useSidecars = False
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
@@ -17,18 +46,118 @@ class Layout(object):
     def __init__(self, layoutText, maxGhosts = None):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.walls = BitGrid(self.width, self.height, initialValue = False)
+        self.food = BitGrid(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.layoutText = layoutText
 
+        # Built on first use, see getHashKeys().
+        self._hashKeys = None
+
+        # Built on first use, see getPossibleActions() and getLegalNeighbors().
+        self._possibleActions = None
+        self._legalNeighbors = None
+
+        # Built on first use, see getJunctionGraph().
+        self._junctionGraph = None
+
+        # Built on first use, see _getVisibleSpan().
+        self._visibility = None
+
+        # Built on first use, see getAnalysis().
+        self._analysis = None
+
         self.processLayoutText(layoutText, maxGhosts)
 
+    def getAnalysis(self):
+        """
+        Get the `pacai.core.layoutAnalysis.LayoutAnalysis` for this layout's walls.
+        The analysis is only done once per layout.
+        """
+
+        if (self._analysis is None):
+            self._analysis = LayoutAnalysis(self.walls)
+
+        return self._analysis
+
+    def getCellIndex(self, x, y):
+        """
+        Get the index of (x, y) in tables that have one entry per cell.
+        Cells are ordered the same way as the bits in a `pacai.core.grid.BitGrid`.
+        """
+
+        return x * self.height + y
+
+    def getHashKeys(self):
+        """
+        Get the random keys used to Zobrist hash the contents of the board.
+        Returns a tuple of two lists (food keys, capsule keys),
+        each with one key per cell (see getCellIndex()).
+
+        The keys are only built once per layout.
+        """
+
+        if (self._hashKeys is None):
+            rng = random.Random(HASH_KEY_SEED)
+            numCells = self.width * self.height
+
+            foodKeys = [rng.getrandbits(HASH_KEY_BITS) for i in range(numCells)]
+            capsuleKeys = [rng.getrandbits(HASH_KEY_BITS) for i in range(numCells)]
+
+            self._hashKeys = (foodKeys, capsuleKeys)
+
+        return self._hashKeys
+
+    def getJunctionGraph(self):
+        """
+        Get the `pacai.core.junctionGraph.JunctionGraph` for this layout's walls.
+        The graph is only built once per layout.
+        """
+
+        if (self._junctionGraph is None):
+            self._junctionGraph = JunctionGraph(self.walls)
+
+        return self._junctionGraph
+
+    def getLegalNeighbors(self, position):
+        """
+        Get the open cells next to (or at) the grid point nearest to the given position.
+        Same as `pacai.core.actions.Actions.getLegalNeighbors`,
+        but uses a table that is only built once per layout.
+        """
+
+        if (self._legalNeighbors is None):
+            self._buildMoveTables()
+
+        x, y = position
+        neighbors = self._legalNeighbors.get((int(x + 0.5), int(y + 0.5)))
+        if (neighbors is None):
+            return Actions.getLegalNeighbors(position, self.walls)
+
+        return list(neighbors)
+
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getPossibleActions(self, position, direction):
+        """
+        Get the actions an agent at the given position can take.
+        Same as `pacai.core.actions.Actions.getPossibleActions`,
+        but positions that are on a grid point use a table that is only built once per layout.
+        """
+
+        if (self._possibleActions is None):
+            self._buildMoveTables()
+
+        # Points between cells (and walls) are not in the table.
+        actions = self._possibleActions.get(position)
+        if (actions is None):
+            return Actions.getPossibleActions(position, direction, self.walls)
+
+        return list(actions)
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -68,15 +197,243 @@ class Layout(object):
         dist, pos = max([(manhattan(p, pacPos), p) for p in poses])
         return pos
 
+    def getVisibility(self, position, direction):
+        """
+        Get the cells that can be seen from a position while facing a direction,
+        as a read-only `pacai.core.grid.BitGrid`.
+        An agent can see its own cell and straight ahead until the first wall.
+        Agents that are stopped can see straight ahead in every direction.
+        Walls (and positions off the board) cannot see anything.
+
+        The grid is built on every call, use isVisibleFrom() to check a single cell.
+        """
+
+        seen = BitGrid(self.width, self.height)
+
+        span = self._getVisibleSpan(position)
+        if (span is None):
+            return seen.freeze()
+
+        x, y = [int(value) for value in position]
+        west, east, south, north = span
+
+        # The rows and columns that are seen.
+        columns = []
+        rows = []
+
+        if (direction == Directions.EAST):
+            columns = range(x, east + 1)
+        elif (direction == Directions.WEST):
+            columns = range(west, x + 1)
+        elif (direction == Directions.NORTH):
+            rows = range(y, north + 1)
+        elif (direction == Directions.SOUTH):
+            rows = range(south, y + 1)
+        elif (direction == Directions.STOP):
+            columns = range(west, east + 1)
+            rows = range(south, north + 1)
+
+        seen.set(x, y, True)
+
+        for seenX in columns:
+            seen.set(seenX, y, True)
+
+        for seenY in rows:
+            seen.set(x, seenY, True)
+
+        return seen.freeze()
+
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
-        row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        """
+        Check if a ghost can be seen by pacman (see getVisibility()).
+        Ghosts between cells are seen if the cell they are closest to is seen.
+        """
+
+        span = self._getVisibleSpan(pacPos)
+        if (span is None):
+            return False
+
+        ghostX, ghostY = nearestPoint(ghostPos)
+        x = int(pacPos[0])
+        y = int(pacPos[1])
+        west, east, south, north = span
+
+        if (ghostY == y):
+            if (pacDirection == Directions.EAST):
+                return x <= ghostX <= east
+            elif (pacDirection == Directions.WEST):
+                return west <= ghostX <= x
+            elif (pacDirection == Directions.STOP):
+                return west <= ghostX <= east
+
+        if (ghostX == x):
+            if (pacDirection == Directions.NORTH):
+                return y <= ghostY <= north
+            elif (pacDirection == Directions.SOUTH):
+                return south <= ghostY <= y
+            elif (pacDirection == Directions.STOP):
+                return south <= ghostY <= north
+
+        return False
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
+    def copy(self):
+        """
+        Get a copy of this layout without parsing the layout text again.
+        The walls, food, capsules, and agents are copied,
+        but the tables built from the walls (which never change) are shared.
+        """
+
+        layout = Layout.__new__(Layout)
+
+        layout.width = self.width
+        layout.height = self.height
+        layout.walls = self.walls.copy()
+        layout.food = self.food.copy()
+        layout.capsules = list(self.capsules)
+        layout.agentPositions = list(self.agentPositions)
+        layout.numGhosts = self.numGhosts
+        layout.layoutText = list(self.layoutText)
+
+        layout._hashKeys = self._hashKeys
+        layout._possibleActions = self._possibleActions
+        layout._legalNeighbors = self._legalNeighbors
+        layout._junctionGraph = self._junctionGraph
+        layout._visibility = self._visibility
+        layout._analysis = self._analysis
+
+        return layout
+
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        return self.copy()
+
+    def _buildMoveTables(self, moveMasks = None):
+        """
+        For every open cell, find the possible actions and the open neighbors.
+        If given, moveMasks (see _getMoveMasks()) is used instead of looking at the walls.
+        """
+
+        if (moveMasks is None):
+            moveMasks = self._getMoveMasks()
+
+        self._possibleActions = {}
+        self._legalNeighbors = {}
+
+        # The actions and offsets for every possible mask.
+        maskMoves = []
+        for mask in range(1 << len(MOVE_DIRECTIONS)):
+            directions = [direction for (i, direction) in enumerate(MOVE_DIRECTIONS)
+                    if (mask & (1 << i))]
+            offsets = [Actions.directionToVector(direction) for direction in directions]
+
+            maskMoves.append((tuple(directions), [(int(dx), int(dy)) for (dx, dy) in offsets]))
+
+        for (x, y) in self.walls.asList(False):
+            actions, offsets = maskMoves[moveMasks[self.getCellIndex(x, y)]]
+
+            self._possibleActions[(x, y)] = actions
+            self._legalNeighbors[(x, y)] = tuple([(x + dx, y + dy) for (dx, dy) in offsets])
+
+    def _buildVisibility(self):
+        """
+        For every open cell, find how far it can see (see _getVisibleSpan()).
+        Each straight run of open cells is walked once, so this is linear in the size of the board.
+        """
+
+        numCells = self.width * self.height
+        self._visibility = ([0] * numCells, [0] * numCells, [0] * numCells, [0] * numCells)
+        west, east, south, north = self._visibility
+
+        for y in range(self.height):
+            start = 0
+            for x in range(self.width + 1):
+                if (x < self.width and not self.walls.get(x, y)):
+                    continue
+
+                for runX in range(start, x):
+                    cellIndex = self.getCellIndex(runX, y)
+                    west[cellIndex] = start
+                    east[cellIndex] = x - 1
+
+                start = x + 1
+
+        for x in range(self.width):
+            start = 0
+            for y in range(self.height + 1):
+                if (y < self.height and not self.walls.get(x, y)):
+                    continue
+
+                for runY in range(start, y):
+                    cellIndex = self.getCellIndex(x, runY)
+                    south[cellIndex] = start
+                    north[cellIndex] = y - 1
+
+                start = y + 1
+
+    def _getMoveMasks(self):
+        """
+        Get the possible moves for each cell (see getCellIndex()) as a bytearray of masks,
+        where bit i is set if MOVE_DIRECTIONS[i] is possible.
+        Walls have no possible moves.
+        """
+
+        masks = bytearray(self.width * self.height)
+
+        for (x, y) in self.walls.asList(False):
+            mask = 0
+
+            for (i, direction) in enumerate(MOVE_DIRECTIONS):
+                dx, dy = Actions.directionToVector(direction)
+                nextX, nextY = x + int(dx), y + int(dy)
+
+                if (nextX < 0 or nextX >= self.width or nextY < 0 or nextY >= self.height):
+                    continue
+
+                if (not self.walls.get(nextX, nextY)):
+                    mask |= (1 << i)
+
+            masks[self.getCellIndex(x, y)] = mask
+
+        return masks
+
+    def _getVisibleSpan(self, position):
+        """
+        Get the farthest cells that can be seen from a position in each direction,
+        as (west x, east x, south y, north y).
+        Returns None for walls and positions that are not on the board.
+        """
+
+        x = int(position[0])
+        y = int(position[1])
+        if (x < 0 or x >= self.width or y < 0 or y >= self.height or self.walls.get(x, y)):
+            return None
+
+        if (self._visibility is None):
+            self._buildVisibility()
+
+        cellIndex = self.getCellIndex(x, y)
+        west, east, south, north = self._visibility
+        return (west[cellIndex], east[cellIndex], south[cellIndex], north[cellIndex])
+
+    def _placeAgents(self, agentChars, maxGhosts):
+        """
+        Set the agent positions from a list of (x, y, layout character)
+        in the order they appear in the layout text.
+        """
+
+        self.agentPositions = []
+        self.numGhosts = 0
+
+        for (x, y, layoutChar) in agentChars:
+            self.processLayoutChar(x, y, layoutChar, maxGhosts)
+
+        self._sortAgentPositions()
+
+    def _sortAgentPositions(self):
+        self.agentPositions.sort()
+        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
 
     def processLayoutText(self, layoutText, maxGhosts):
         """
@@ -99,14 +456,14 @@ class Layout(object):
             for x in range(self.width):
                 layoutChar = layoutText[maxY - y][x]
                 self.processLayoutChar(x, y, layoutChar, maxGhosts)
-        self.agentPositions.sort()
-        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
+
+        self._sortAgentPositions()
 
     def processLayoutChar(self, x, y, layoutChar, maxGhosts):
         if (layoutChar == '%'):
-            self.walls[x][y] = True
+            self.walls.set(x, y, True)
         elif (layoutChar == '.'):
-            self.food[x][y] = True
+            self.food.set(x, y, True)
         elif (layoutChar == 'o'):
             self.capsules.append((x, y))
         elif (layoutChar == 'P'):
@@ -119,6 +476,12 @@ class Layout(object):
             self.numGhosts += 1
 
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
+    """
+    Load a layout by name.
+    Each layout file is only parsed once per process (as long as it does not change),
+    later calls get a copy of the layout that was already loaded.
+    """
+
     if (not name.endswith('.lay')):
         name += '.lay'
 
@@ -126,6 +489,45 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not os.path.isfile(path)):
         raise Exception("Could not locate layout file: '%s'." % (path))
 
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _layoutCache.get(path)
+    if (cached is None or cached[0] != stamp):
+        cached = (stamp, ) + _compileLayout(path, stamp)
+        _layoutCache[path] = cached
+
+        # The analysis is cheap, and building it here shares it with every copy.
+        cached[1].getAnalysis()
+
+    layout = cached[1].copy()
+    if (maxGhosts is not None):
+        layout._placeAgents(cached[2], maxGhosts)
+
+    return layout
+
+def setUseSidecars(enabled):
+    """
+    Set whether compiled layouts are saved to (and loaded from) a file next to the layout file.
+    This allows other processes to skip parsing the layout.
+    """
+
+    global useSidecars
+    useSidecars = enabled
+
+def _compileLayout(path, stamp):
+    """
+    Load a layout (with all its ghosts) and build its tables.
+    Returns the layout and its agent characters (see Layout._placeAgents()).
+    """
+
+    sidecarPath = path + SIDECAR_EXTENSION
+
+    if (useSidecars):
+        compiled = _loadSidecar(sidecarPath, stamp)
+        if (compiled is not None):
+            return compiled
+
     rows = []
     with open(path, 'r') as file:
         for line in file:
@@ -133,4 +535,115 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
             if (line != ''):
                 rows.append(line)
 
-    return Layout(rows, maxGhosts)
+    layout = Layout(rows)
+    moveMasks = layout._getMoveMasks()
+    layout._buildMoveTables(moveMasks)
+    layout.getHashKeys()
+
+    # Agents in the same order that Layout.processLayoutText() finds them.
+    agentChars = []
+    maxY = layout.height - 1
+    for y in range(layout.height):
+        for x in range(layout.width):
+            layoutChar = rows[maxY - y][x]
+            if (layoutChar in ['P', 'G'] or layoutChar in GHOST_NUMS):
+                agentChars.append((x, y, layoutChar))
+
+    if (useSidecars):
+        _saveSidecar(sidecarPath, stamp, layout, agentChars, moveMasks)
+
+    return layout, agentChars
+
+def _loadSidecar(path, stamp):
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    if (len(data) < SIDECAR_HEADER.size):
+        return None
+
+    (magic, mtime, size, width, height, numCapsules, numAgents) = SIDECAR_HEADER.unpack_from(data)
+    if (magic != SIDECAR_MAGIC or (mtime, size) != stamp):
+        return None
+
+    numCells = width * height
+    gridSize = (numCells + 7) // 8
+
+    # The layout file has not changed, so a sidecar that does not fit its header is corrupt.
+    try:
+        capsulesFormat = struct.Struct('=%dI' % (2 * numCapsules))
+        agentsFormat = struct.Struct('=%dI%ds' % (2 * numAgents, numAgents))
+
+        offset = SIDECAR_HEADER.size
+        if (len(data) < (offset + 2 * gridSize + capsulesFormat.size + agentsFormat.size
+                + numCells)):
+            raise ValueError("Sidecar is too short.")
+
+        walls = data[offset:(offset + gridSize)]
+        offset += gridSize
+
+        food = data[offset:(offset + gridSize)]
+        offset += gridSize
+
+        capsules = capsulesFormat.unpack_from(data, offset)
+        offset += capsulesFormat.size
+
+        agents = agentsFormat.unpack_from(data, offset)
+        offset += agentsFormat.size
+
+        moveMasks = data[offset:(offset + numCells)]
+        offset += numCells
+
+        layoutText = data[offset:].decode().split('\n')
+    except (struct.error, ValueError):
+        logging.warning("Ignoring corrupt layout sidecar: '%s'." % (path))
+        return None
+
+    layout = Layout.__new__(Layout)
+
+    layout.width = width
+    layout.height = height
+    layout.walls = BitGrid.fromBytes(width, height, walls)
+    layout.food = BitGrid.fromBytes(width, height, food)
+    layout.capsules = list(zip(capsules[0::2], capsules[1::2]))
+    layout.layoutText = layoutText
+
+    layout._hashKeys = None
+    layout._junctionGraph = None
+    layout._visibility = None
+    layout._analysis = None
+    layout._buildMoveTables(moveMasks)
+    layout.getHashKeys()
+
+    agentChars = [(agents[2 * i], agents[2 * i + 1], chr(agents[-1][i])) for i in range(numAgents)]
+    layout._placeAgents(agentChars, None)
+
+    return layout, agentChars
+
+def _saveSidecar(path, stamp, layout, agentChars, moveMasks):
+    capsules = [value for capsule in layout.capsules for value in capsule]
+    agentPositions = [value for (x, y, layoutChar) in agentChars for value in (x, y)]
+    agentLetters = ''.join([layoutChar for (x, y, layoutChar) in agentChars]).encode()
+
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+
+    try:
+        with open(tempPath, 'wb') as file:
+            file.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, stamp[0], stamp[1],
+                    layout.width, layout.height, len(layout.capsules), len(agentChars)))
+            file.write(layout.walls.toBytes())
+            file.write(layout.food.toBytes())
+            file.write(struct.pack('=%dI' % (len(capsules)), *capsules))
+            file.write(struct.pack('=%dI%ds' % (len(agentPositions), len(agentLetters)),
+                    *agentPositions, agentLetters))
+            file.write(moveMasks)
+            file.write('\n'.join(layout.layoutText).encode())
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Could not save compiled layout to '%s': %s" % (path, ex))
+
+        if (os.path.exists(tempPath)):
+            os.remove(tempPath)
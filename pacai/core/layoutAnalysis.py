@@ -0,0 +1,253 @@
+"""
+Facts about a layout that only depend on its walls,
+like which cells are in dead ends and which cells cut the maze in two.
+All of them are found with linear-time graph algorithms,
+and only need to be computed once per layout (see `pacai.core.layout.Layout.getAnalysis`).
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+class LayoutAnalysis(object):
+    """
+    The static structure of a layout's open cells.
+
+    Dead ends are the parts of the maze that can only be left the way they were entered
+    (the cells that are removed by repeatedly removing cells with only one open neighbor).
+    Parts of the maze that do not have any loops at all are not considered dead ends,
+    since there is nowhere to escape to.
+    Each dead end cell has a depth (the number of steps to get out of the dead end)
+    and an exit (the cell just outside of the dead end).
+    An agent that is chased into a dead end deeper than the distance to its chaser is trapped.
+
+    Articulation points are the cells that would split the maze apart if they were walls.
+
+    Border cells are the open cells in the last column of each side of a capture board,
+    and entry cells are the border cells that connect to the other side.
+    """
+
+    def __init__(self, walls):
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+
+        self._openCells = walls.asList(False)
+
+        # {position: [neighbor position, ...], ...}
+        self._neighbors = {}
+        for (x, y) in self._openCells:
+            self._neighbors[(x, y)] = []
+
+            for direction in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(direction)
+                neighbor = (x + int(dx), y + int(dy))
+
+                if (neighbor[0] < 0 or neighbor[0] >= self._width
+                        or neighbor[1] < 0 or neighbor[1] >= self._height):
+                    continue
+
+                if (not walls.get(*neighbor)):
+                    self._neighbors[(x, y)].append(neighbor)
+
+        # {position: depth, ...} and {position: exit, ...} for cells in dead ends.
+        self._deadEndDepths = {}
+        self._deadEndExits = {}
+        self._findDeadEnds()
+
+        self._articulationPoints = set()
+        self._findArticulationPoints()
+
+        # [red cells, blue cells]
+        self._borderCells = [[], []]
+        self._entryCells = [[], []]
+        self._findBorders()
+
+    def getArticulationPoints(self):
+        """
+        Get the cells that would split the maze into more pieces if they were walls.
+        """
+
+        return [cell for cell in self._openCells if cell in self._articulationPoints]
+
+    def getBorderCells(self, red):
+        """
+        Get the open cells on a team's side that are next to the middle of the board.
+        """
+
+        return self._borderCells[self._sideIndex(red)]
+
+    def getDeadEndCells(self):
+        return [cell for cell in self._openCells if cell in self._deadEndDepths]
+
+    def getDeadEndDepth(self, position):
+        """
+        Get the number of steps it takes to get out of the dead end that a position is in,
+        or 0 if the position is not in a dead end.
+        """
+
+        return self._deadEndDepths.get(position, 0)
+
+    def getDeadEndExit(self, position):
+        """
+        Get the first cell outside of the dead end that a position is in,
+        or None if the position is not in a dead end.
+        """
+
+        return self._deadEndExits.get(position)
+
+    def getEntryCells(self, red):
+        """
+        Get the border cells (see getBorderCells()) of a team's side
+        that an opponent can walk into directly from the other side.
+        """
+
+        return self._entryCells[self._sideIndex(red)]
+
+    def isArticulationPoint(self, position):
+        return position in self._articulationPoints
+
+    def isDeadEnd(self, position):
+        return position in self._deadEndDepths
+
+    def _findArticulationPoints(self):
+        """
+        Find the articulation points with an iterative version of Tarjan's depth-first search.
+        """
+
+        order = {}
+        low = {}
+
+        for root in self._openCells:
+            if (root in order):
+                continue
+
+            order[root] = len(order)
+            low[root] = order[root]
+            rootChildren = 0
+
+            # [(cell, parent, index of the next neighbor to look at), ...]
+            stack = [(root, None, 0)]
+            while (len(stack) > 0):
+                cell, parent, neighborIndex = stack[-1]
+                neighbors = self._neighbors[cell]
+
+                if (neighborIndex < len(neighbors)):
+                    stack[-1] = (cell, parent, neighborIndex + 1)
+                    neighbor = neighbors[neighborIndex]
+
+                    if (neighbor not in order):
+                        order[neighbor] = len(order)
+                        low[neighbor] = order[neighbor]
+                        stack.append((neighbor, cell, 0))
+
+                        if (cell == root):
+                            rootChildren += 1
+                    elif (neighbor != parent):
+                        low[cell] = min(low[cell], order[neighbor])
+
+                    continue
+
+                # All the neighbors are done, pass the low point back up to the parent.
+                stack.pop()
+                if (parent is None):
+                    continue
+
+                low[parent] = min(low[parent], low[cell])
+                if (parent != root and low[cell] >= order[parent]):
+                    self._articulationPoints.add(parent)
+
+            if (rootChildren > 1):
+                self._articulationPoints.add(root)
+
+    def _findBorders(self):
+        # The same split as `pacai.bin.capture.CaptureGameState.isOnRedSide`.
+        blueStart = int(self._width / 2)
+
+        sides = [(blueStart - 1, 0, blueStart), (blueStart, 1, blueStart - 1)]
+
+        for (x, sideIndex, otherX) in sides:
+            if (x < 0 or x >= self._width):
+                continue
+
+            for y in range(self._height):
+                if ((x, y) not in self._neighbors):
+                    continue
+
+                self._borderCells[sideIndex].append((x, y))
+                if ((otherX, y) in self._neighbors[(x, y)]):
+                    self._entryCells[sideIndex].append((x, y))
+
+    def _findDeadEnds(self):
+        """
+        Peel off cells with only one remaining neighbor until there are none left.
+        The peeled cells are the dead ends.
+        Parts of the maze without any loops would peel away completely,
+        and have no way out to measure against, so they are skipped.
+        """
+
+        degrees = {}
+        peeled = []
+        peeledParents = {}
+
+        for component in self._findComponents():
+            numEdges = sum([len(self._neighbors[cell]) for cell in component]) // 2
+            if (numEdges < len(component)):
+                continue
+
+            for cell in component:
+                degrees[cell] = len(self._neighbors[cell])
+                if (degrees[cell] == 1):
+                    peeled.append(cell)
+
+        # Cells are added to the list while it is walked.
+        # Since every remaining part has a loop, there is always a neighbor left to peel into.
+        for cell in peeled:
+            parent = [neighbor for neighbor in self._neighbors[cell]
+                    if (neighbor not in peeledParents)][0]
+
+            peeledParents[cell] = parent
+            degrees[parent] -= 1
+            if (degrees[parent] == 1):
+                peeled.append(parent)
+
+        # Cells closer to the exit were peeled later.
+        for cell in reversed(peeled):
+            parent = peeledParents[cell]
+
+            if (parent in peeledParents):
+                self._deadEndDepths[cell] = self._deadEndDepths[parent] + 1
+                self._deadEndExits[cell] = self._deadEndExits[parent]
+            else:
+                self._deadEndDepths[cell] = 1
+                self._deadEndExits[cell] = parent
+
+    def _findComponents(self):
+        """
+        Get the connected parts of the maze, as lists of cells.
+        """
+
+        components = []
+        seen = set()
+
+        for start in self._openCells:
+            if (start in seen):
+                continue
+
+            seen.add(start)
+            component = [start]
+
+            # The component grows while it is walked.
+            for cell in component:
+                for neighbor in self._neighbors[cell]:
+                    if (neighbor not in seen):
+                        seen.add(neighbor)
+                        component.append(neighbor)
+
+            components.append(component)
+
+        return components
+
+    def _sideIndex(self, red):
+        if (red):
+            return 0
+
+        return 1
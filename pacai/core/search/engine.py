@@ -0,0 +1,176 @@
+"""
+Reference implementations of the standard graph searches.
+
+All the searches keep the states they have finished with in a set,
+move a state up the fringe (instead of adding it again) when a cheaper way to it is found,
+and only build the list of actions (by following parent pointers back from the goal)
+once a goal is found.
+So each expansion takes (amortized) constant time on top of the problem's own work.
+
+The searches return a list of actions that reaches a goal, or None if there is no goal to reach.
+`pacai.agents.search.base.SearchAgent` can use these by their short names, e.g. `fn=astar`.
+"""
+
+import collections
+
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.util.priorityQueue import PriorityQueue
+
+# How much more the heuristic counts than the cost so far in weightedAStarSearch().
+DEFAULT_WEIGHT = 2.0
+
+def aStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    The path is optimal if the heuristic is consistent.
+    """
+
+    return _bestFirstSearch(problem, lambda state, cost: cost + heuristic(state, problem))
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest nodes in the search tree first.
+    """
+
+    start = problem.startingState()
+
+    # {state: (parent state, action), ...} for every state that was ever put on the fringe.
+    parents = {start: None}
+    fringe = collections.deque([start])
+
+    while (len(fringe) > 0):
+        state = fringe.popleft()
+        if (problem.isGoal(state)):
+            return _buildPath(parents, state)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor not in parents):
+                parents[successor] = (state, action)
+                fringe.append(successor)
+
+    return None
+
+def depthFirstSearch(problem):
+    """
+    Search the deepest nodes in the search tree first.
+    """
+
+    parents = {}
+    closed = set()
+
+    # [(state, parent state, action), ...]
+    fringe = [(problem.startingState(), None, None)]
+
+    while (len(fringe) > 0):
+        state, parent, action = fringe.pop()
+        if (state in closed):
+            continue
+
+        closed.add(state)
+        if (parent is None):
+            parents[state] = None
+        else:
+            parents[state] = (parent, action)
+
+        if (problem.isGoal(state)):
+            return _buildPath(parents, state)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor not in closed):
+                fringe.append((successor, state, action))
+
+    return None
+
+def uniformCostSearch(problem):
+    """
+    Search the node of least total cost first.
+    """
+
+    return _bestFirstSearch(problem, lambda state, cost: cost)
+
+def weightedAStarSearch(problem, heuristic = nullHeuristic, weight = DEFAULT_WEIGHT):
+    """
+    A* search that trusts the heuristic more than the cost so far.
+    This usually expands far fewer nodes than A*,
+    but the path may be up to `weight` times longer than the best path.
+    """
+
+    return _bestFirstSearch(problem, lambda state, cost: cost + weight * heuristic(state, problem))
+
+def _bestFirstSearch(problem, priorityFunction):
+    """
+    Search the node with the lowest priorityFunction(state, cost so far) first.
+    When a cheaper way to a state that is already on the fringe is found,
+    the state is moved up in the fringe instead of being put on it again.
+    """
+
+    start = problem.startingState()
+
+    # {state: (parent state, action), ...} for the best way to each state found so far.
+    parents = {start: None}
+    closed = set()
+
+    # The best cost found so far for each state that was ever put on the fringe.
+    costs = {start: 0}
+
+    fringe = PriorityQueue()
+    fringe.push(start, priorityFunction(start, 0))
+
+    while (not fringe.isEmpty()):
+        state = fringe.pop()
+        if (problem.isGoal(state)):
+            return _buildPath(parents, state)
+
+        closed.add(state)
+        cost = costs[state]
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in closed):
+                continue
+
+            successorCost = cost + stepCost
+            if (successor in costs and costs[successor] <= successorCost):
+                continue
+
+            costs[successor] = successorCost
+            parents[successor] = (state, action)
+            fringe.update(successor, priorityFunction(successor, successorCost))
+
+    return None
+
+def _buildPath(parents, state):
+    """
+    Follow the parent pointers back from a state to the start,
+    and return the actions that lead from the start to the state.
+    """
+
+    actions = []
+
+    while (parents[state] is not None):
+        state, action = parents[state]
+        actions.append(action)
+
+    actions.reverse()
+    return actions
+
+# Abbreviations
+
+astar = aStarSearch
+bfs = breadthFirstSearch
+dfs = depthFirstSearch
+ucs = uniformCostSearch
+wastar = weightedAStarSearch
+
+# The searches by name (full and short), see `pacai.agents.search.base.SearchAgent`.
+SEARCH_FUNCTIONS = {
+    'aStarSearch': aStarSearch,
+    'astar': aStarSearch,
+    'breadthFirstSearch': breadthFirstSearch,
+    'bfs': breadthFirstSearch,
+    'depthFirstSearch': depthFirstSearch,
+    'dfs': depthFirstSearch,
+    'uniformCostSearch': uniformCostSearch,
+    'ucs': uniformCostSearch,
+    'weightedAStarSearch': weightedAStarSearch,
+    'wastar': weightedAStarSearch,
+}
@@ -9,7 +9,7 @@ class FoodSearchProblem(SearchProblem):
 
     A search state in this problem is a tuple (pacmanPosition, foodGrid).
     Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
-    and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
+    and foodGrid is a `pacai.core.grid.BitGrid` of either `True` or `False`,
     specifying remaining food.
     """
 
@@ -40,7 +40,7 @@ class FoodSearchProblem(SearchProblem):
             nextx, nexty = int(x + dx), int(y + dy)
             if not self.walls[nextx][nexty]:
                 nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
+                nextFood.set(nextx, nexty, False)
                 successors.append((((nextx, nexty), nextFood), direction, 1))
 
         return successors
@@ -51,7 +51,7 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        x, y = self.startingGameState.getPacmanPosition()
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +62,93 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    A `FoodSearchProblem` with a state that is cheap to make, hash, and compare.
+
+    A search state in this problem is a tuple (cellIndex, foodMask).
+    Where cellIndex is Pacman's position as a cell index
+    (see `pacai.core.layout.Layout.getCellIndex`),
+    and foodMask is an int with bit i set if the i-th piece of food
+    (in the order of `CompactFoodSearchProblem.getFoodPositions` on the starting state)
+    has not been eaten yet.
+    Use `CompactFoodSearchProblem.getPosition` and `CompactFoodSearchProblem.getFoodPositions`
+    to turn a state back into positions (e.g., in a heuristic).
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        layout = startingGameState.getInitialLayout()
+        numCells = layout.getWidth() * layout.getHeight()
+
+        # The position of every cell.
+        self._positions = [None] * numCells
+
+        # The bit for the food in every cell (0 for cells that never had food).
+        self._foodBits = [0] * numCells
+
+        # The (next cell index, action) pairs for every open cell.
+        self._moves = [()] * numCells
+
+        self._foodPositions = self.start[1].asList()
+        for (i, (x, y)) in enumerate(self._foodPositions):
+            self._foodBits[layout.getCellIndex(x, y)] = 1 << i
+
+        # The moves come from the layout's tables, in the same order as FoodSearchProblem.
+        for (x, y) in self.walls.asList(False):
+            possibleActions = layout.getPossibleActions((x, y), Directions.STOP)
+
+            moves = []
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                if (direction not in possibleActions):
+                    continue
+
+                dx, dy = Actions.directionToVector(direction)
+                moves.append((layout.getCellIndex(x + int(dx), y + int(dy)), direction))
+
+            cellIndex = layout.getCellIndex(x, y)
+            self._positions[cellIndex] = (x, y)
+            self._moves[cellIndex] = tuple(moves)
+
+        x, y = self.start[0]
+        self.start = (layout.getCellIndex(x, y), (1 << len(self._foodPositions)) - 1)
+
+    def getFoodPositions(self, state):
+        """
+        Get the positions of the food that is left in a state.
+        """
+
+        mask = state[1]
+        return [position for (i, position) in enumerate(self._foodPositions) if (mask >> i) & 1]
+
+    def getPosition(self, state):
+        """
+        Get Pacman's (x, y) position in a state.
+        """
+
+        return self._positions[state[0]]
+
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        cellIndex, mask = state
+
+        successors = []
+        for (nextIndex, direction) in self._moves[cellIndex]:
+            successors.append(((nextIndex, mask & ~self._foodBits[nextIndex]), direction, 1))
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        position = self._positions[cellIndex]
+        if (position not in self._visitedLocations):
+            self._visitedLocations.add(position)
+            self._visitHistory.append(position)
+
+        return successors
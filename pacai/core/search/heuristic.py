@@ -3,7 +3,14 @@ A heuristic function estimates the cost from the current state to the nearest
 goal in the provided `pacai.core.search.problem.SearchProblem`.
 """
 
+import collections
+
 from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.search.food import CompactFoodSearchProblem
+
+# The number of minimum spanning tree weights a `FoodDistances` remembers.
+MST_MEMO_SIZE = 65536
 
 def null(state, problem = None):
     """
@@ -35,6 +42,149 @@ def euclidean(position, problem):
 def numFood(state, problem):
     """
     This heuristic is the amount of food left to on the board.
+    Works for both grid states (`pacai.core.search.food.FoodSearchProblem`)
+    and mask states (`pacai.core.search.food.CompactFoodSearchProblem`).
     """
 
+    if (isinstance(state[1], int)):
+        return bin(state[1]).count('1')
+
     return state[1].count()
+
+def mazeFood(state, problem):
+    """
+    This heuristic is the maze distance to the closest food
+    plus the weight of a minimum spanning tree (using maze distances) over all the food left.
+    Any path that eats all the food has to go to some food first and then connect all the food,
+    so this never overestimates (and is consistent).
+
+    Works for both `pacai.core.search.food.FoodSearchProblem`
+    and `pacai.core.search.food.CompactFoodSearchProblem`.
+    All the distances are computed once per problem (see `FoodDistances`).
+    """
+
+    if ('foodDistances' not in problem.heuristicInfo):
+        problem.heuristicInfo['foodDistances'] = FoodDistances(problem)
+
+    return problem.heuristicInfo['foodDistances'].estimate(state)
+
+class FoodDistances(object):
+    """
+    Maze distances between the food of a food search problem
+    (and from every position to the food), computed once when the problem starts.
+
+    The remaining food is kept as a bitmask over the starting food
+    (the same as the food mask of a `pacai.core.search.food.CompactFoodSearchProblem`),
+    and the weights of minimum spanning trees over the remaining food
+    are remembered by mask (for the MST_MEMO_SIZE most recently used masks).
+    """
+
+    def __init__(self, problem, memoSize = MST_MEMO_SIZE):
+        self._problem = problem
+        self._compact = isinstance(problem, CompactFoodSearchProblem)
+        self._memoSize = memoSize
+
+        # {mask: weight, ...} in least recently used order.
+        self._mstWeights = collections.OrderedDict()
+
+        startingState = problem.startingGameState
+        table = distanceCalculator.getDistanceTable(startingState.getInitialLayout())
+        positions = table.getPositions()
+
+        self._foodPositions = startingState.getFood().asList()
+        # Food that cannot be reached is as far away as it is for every other distance lookup.
+        rows = []
+        for food in self._foodPositions:
+            rows.append([distanceCalculator.DEFAULT_DISTANCE
+                    if (distance == distanceCalculator.UNREACHABLE) else distance
+                    for distance in table.getRow(table.getIndex(food))])
+
+        # [[distance to food j, ...] for food i].
+        self._foodDistances = [[row[table.getIndex(food)] for food in self._foodPositions]
+                for row in rows]
+
+        # {position: [distance to food i, ...], ...}
+        self._positionDistances = {}
+        for (index, position) in enumerate(positions):
+            self._positionDistances[position] = [row[index] for row in rows]
+
+    def estimate(self, state):
+        """
+        Get the heuristic value (see `mazeFood`) of a state of the problem.
+        """
+
+        position, mask = self._getPositionAndMask(state)
+        if (mask == 0):
+            return 0
+
+        distances = self._positionDistances[position]
+        closest = min([distances[i] for i in self._getFoodIndexes(mask)])
+
+        return closest + self.getMSTWeight(mask)
+
+    def getFoodPositions(self):
+        """
+        Get the positions of the starting food, in the order of the bits in a food mask.
+        """
+
+        return self._foodPositions
+
+    def getMSTWeight(self, mask):
+        """
+        Get the weight of a minimum spanning tree over the food in a mask.
+        """
+
+        weight = self._mstWeights.get(mask)
+        if (weight is not None):
+            self._mstWeights.move_to_end(mask)
+            return weight
+
+        weight = self._computeMSTWeight(self._getFoodIndexes(mask))
+
+        self._mstWeights[mask] = weight
+        if (len(self._mstWeights) > self._memoSize):
+            self._mstWeights.popitem(last = False)
+
+        return weight
+
+    def _computeMSTWeight(self, foodIndexes):
+        """
+        Prim's algorithm on the complete graph of food.
+        """
+
+        if (len(foodIndexes) <= 1):
+            return 0
+
+        # The cheapest edge from each food not in the tree yet to the tree.
+        first = foodIndexes[0]
+        costs = {}
+        for i in foodIndexes[1:]:
+            costs[i] = self._foodDistances[first][i]
+
+        weight = 0
+        while (len(costs) > 0):
+            nextFood = min(costs, key = costs.get)
+            weight += costs.pop(nextFood)
+
+            distances = self._foodDistances[nextFood]
+            for i in costs:
+                if (distances[i] < costs[i]):
+                    costs[i] = distances[i]
+
+        return weight
+
+    def _getFoodIndexes(self, mask):
+        return [i for i in range(len(self._foodPositions)) if (mask >> i) & 1]
+
+    def _getPositionAndMask(self, state):
+        if (self._compact):
+            return self._problem.getPosition(state), state[1]
+
+        position, foodGrid = state
+
+        mask = 0
+        for (i, (x, y)) in enumerate(self._foodPositions):
+            if (foodGrid[x][y]):
+                mask |= (1 << i)
+
+        return position, mask
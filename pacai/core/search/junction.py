@@ -0,0 +1,82 @@
+from pacai.core.search.position import DEFAULT_GOAL_POSITION
+from pacai.core.search.position import PositionSearchProblem
+
+class JunctionSearchProblem(PositionSearchProblem):
+    """
+    A `pacai.core.search.position.PositionSearchProblem` that moves along the
+    `pacai.core.junctionGraph.JunctionGraph` of the layout instead of one cell at a time.
+    The state space is still (x, y) positions, but only junctions, dead ends,
+    and the start and goal positions are ever generated.
+
+    Each action found by a search is a tuple of the directions along a corridor,
+    and the cost is the length of the corridor.
+    Use `JunctionSearchProblem.expandActions` (which `pacai.agents.search.base.SearchAgent`
+    already does) to get a normal list of directions.
+    Since the costs are not all the same, use a search that looks at costs (like UCS or A*)
+    to get the shortest path.
+    """
+
+    def __init__(self, gameState, goal = DEFAULT_GOAL_POSITION, start = None):
+        """
+        Args:
+            gameState: A `pacai.core.gamestate.AbstractGameState`.
+            goal: The target position.
+        """
+
+        super().__init__(gameState, goal = goal, start = start)
+
+        self.graph = gameState.getInitialLayout().getJunctionGraph()
+
+        # The goal may be in the middle of a corridor, so it gets checked for on that edge.
+        self._goalEdges = {}
+        if (not self.graph.isNode(self.goal)):
+            for (edge, offset) in self.graph.getLocations(self.goal):
+                self._goalEdges[edge] = offset
+
+    def actionsCost(self, actions):
+        return super().actionsCost(self.expandActions(actions))
+
+    def expandActions(self, actions):
+        """
+        Flatten corridors into single directions.
+        """
+
+        if (actions is None):
+            return None
+
+        directions = []
+        for action in actions:
+            if (isinstance(action, tuple)):
+                directions += action
+            else:
+                directions.append(action)
+
+        return directions
+
+    def successorStates(self, state):
+        """
+        Returns the positions at the other ends of all the corridors leading away from the state
+        (and the goal, if it is along one of them).
+        """
+
+        successors = []
+
+        for (edge, offset) in self.graph.getLocations(state):
+            targets = [0, edge.cost]
+            if (edge in self._goalEdges):
+                targets.append(self._goalEdges[edge])
+
+            for target in targets:
+                if (target == offset):
+                    continue
+
+                successors.append((edge.cells[target], edge.getActions(offset, target),
+                        abs(target - offset)))
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (state not in self._visitedLocations):
+            self._visitedLocations.add(state)
+            self._visitHistory.append(state)
+
+        return successors
@@ -43,6 +43,14 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def expandActions(self, actions):
+        """
+        Convert the actions found by a search on this problem into the actions an agent takes.
+        For most problems, these are the same thing.
+        """
+
+        return actions
+
     def getExpandedCount(self):
         return self._numExpanded
 
@@ -130,15 +130,11 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
     # for pacman
     def maxValue(self, state, depth):
-        actions = state.getLegalActions(0)
         max_score = -float("inf")
         max_action = Directions.STOP
 
-        for action in actions:
-            # Don't consider stopping in the search
-            if action == Directions.STOP:
-                continue
-            successor = state.generateSuccessor(0, action)
+        # Don't consider stopping in the search
+        for action, successor in state.generateSuccessors(0, includeStop = False):
             # gets minimax from next ghost
             action_score, new_action = self.minimax(successor, 1, depth)
             if action_score > max_score:
@@ -148,7 +144,6 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
     # for ghosts
     def minValue(self, state, agent, depth):
-        actions = state.getLegalActions(agent)
         min_score = float("inf")
         min_action = Directions.STOP
 
@@ -160,10 +155,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
             new_agent = agent + 1
             new_depth = depth
 
-        for action in actions:
-            if action == Directions.STOP:
-                continue
-            successor = state.generateSuccessor(agent, action)
+        for action, successor in state.generateSuccessors(agent, includeStop = False):
             # gets minimax from pacman/next ghost
             action_score, new_action = self.minimax(successor, new_agent, new_depth)
             if action_score < min_score:
@@ -286,15 +278,11 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             return self.expectedValue(state, agent, depth)
         
     def maxValue(self, state, depth):
-        actions = state.getLegalActions(0)
         max_score = -float("inf")
         max_action = Directions.STOP
 
-        for action in actions:
-            # Don't consider stopping in the search
-            if action == Directions.STOP:
-                continue
-            successor = state.generateSuccessor(0, action)
+        # Don't consider stopping in the search
+        for action, successor in state.generateSuccessors(0, includeStop = False):
             action_score, new_action = self.expectimax(successor, 1, depth)
             if action_score > max_score:
                 max_score = action_score
@@ -302,10 +290,12 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         return max_score, max_action
 
     def expectedValue(self, state, agent, depth):
-        actions = state.getLegalActions(agent)
+        # Every legal action is equally likely, but stopping is not searched.
+        # The legal actions come from the layout's move tables, so counting them is cheap.
+        successors = state.generateSuccessors(agent, includeStop = False)
         expected_score = 0
         expected_action = Directions.STOP
-        probability = 1.0 / len(actions)
+        probability = 1.0 / len(state.getLegalActions(agent))
 
         if agent == state.getNumAgents() - 1:
             new_agent = 0
@@ -314,11 +304,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             new_agent = agent + 1
             new_depth = depth
 
-        for action in actions:
-            if action == Directions.STOP:
-                continue
-
-            successor = state.generateSuccessor(agent, action)
+        for action, successor in successors:
             action_score, new_action = self.expectimax(successor, new_agent, new_depth)
 
             expected_score += probability * action_score
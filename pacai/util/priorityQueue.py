@@ -2,33 +2,194 @@
 Priority queue containers.
 """
 
-import heapq
+import itertools
+
+# The fields of the entries in a PriorityQueue's heap.
+ENTRY_PRIORITY = 0
+ENTRY_COUNT = 1
+ENTRY_ITEM = 2
+ENTRY_POSITION = 3
 
 class PriorityQueue(object):
     """
     Implements a priority queue data structure.
     Each inserted item has a priority associated with it,
     and the user is usually interested in quick retrieval of the lowest-priority item in the queue.
-    This data structure allows O(1) access to the lowest-priority item.
+    This data structure allows O(log n) removal of the lowest-priority item
+    (and O(1) access to it through the front of the heap).
+
+    Items with the same priority come out in the order they were pushed,
+    so items never get compared to each other.
 
-    Note that this PriorityQueue does not allow you to change the priority of an item.
-    However, you may insert the same item multiple times with different priorities.
+    The same item may be inserted multiple times with different priorities.
+    The priority of an item that is already in the queue can also be changed
+    (see `PriorityQueue.decreaseKey` and `PriorityQueue.update`),
+    which keeps the queue from filling up with stale copies of the same item.
+    Those methods (and `in`) are fastest for hashable items.
     """
 
     def __init__(self):
+        # A binary heap of [priority, insertion count, item, position in the heap] entries.
         self.heap = []
 
-    def push(self, item, priority):
-        pair = (priority, item)
-        heapq.heappush(self.heap, pair)
+        self._counter = itertools.count()
 
-    def pop(self):
-        (priority, item) = heapq.heappop(self.heap)
-        return item
+        # {item: [entry, ...], ...}
+        # Only built once an item needs to be looked up, see _findEntry().
+        self._entries = None
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item that is already in the queue.
+        If the item is in the queue more than once, the copy with the lowest priority is changed.
+        Raises a KeyError if the item is not in the queue,
+        and a ValueError if the new priority is higher than the current one.
+        """
+
+        entry = self._findEntry(item)
+        if (entry is None):
+            raise KeyError(item)
+
+        if (priority > entry[ENTRY_PRIORITY]):
+            raise ValueError("Cannot raise the priority of an item from %s to %s." %
+                    (entry[ENTRY_PRIORITY], priority))
+
+        entry[ENTRY_PRIORITY] = priority
+        self._siftUp(entry[ENTRY_POSITION])
 
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def pop(self):
+        entry = self.heap[0]
+        last = self.heap.pop()
+
+        if (len(self.heap) > 0):
+            last[ENTRY_POSITION] = 0
+            self.heap[0] = last
+            self._siftDown(0)
+
+        if (self._entries is not None):
+            self._removeIndex(entry)
+
+        return entry[ENTRY_ITEM]
+
+    def push(self, item, priority):
+        entry = [priority, next(self._counter), item, len(self.heap)]
+        self.heap.append(entry)
+
+        if (self._entries is not None):
+            self._addIndex(entry)
+
+        self._siftUp(entry[ENTRY_POSITION])
+
+    def update(self, item, priority):
+        """
+        Push an item if it is not in the queue,
+        or lower its priority if it is in the queue with a higher priority.
+        Otherwise, nothing happens.
+        """
+
+        entry = self._findEntry(item)
+        if (entry is None):
+            # Subclasses may change the signature of push().
+            PriorityQueue.push(self, item, priority)
+        elif (priority < entry[ENTRY_PRIORITY]):
+            entry[ENTRY_PRIORITY] = priority
+            self._siftUp(entry[ENTRY_POSITION])
+
+    def _addIndex(self, entry):
+        try:
+            self._entries.setdefault(entry[ENTRY_ITEM], []).append(entry)
+        except TypeError:
+            # Unhashable items are not indexed.
+            pass
+
+    def _findEntry(self, item):
+        """
+        Get the entry with the lowest priority for an item, or None if the item is not queued.
+        """
+
+        if (self._entries is None):
+            self._entries = {}
+            for entry in self.heap:
+                self._addIndex(entry)
+
+        try:
+            entries = self._entries.get(item)
+        except TypeError:
+            # Unhashable items have to be looked for.
+            entries = [entry for entry in self.heap if entry[ENTRY_ITEM] == item]
+
+        if (not entries):
+            return None
+
+        return min(entries, key = lambda entry: (entry[ENTRY_PRIORITY], entry[ENTRY_COUNT]))
+
+    def _removeIndex(self, entry):
+        try:
+            entries = self._entries.get(entry[ENTRY_ITEM])
+        except TypeError:
+            return
+
+        if (entries is None):
+            return
+
+        entries[:] = [other for other in entries if other is not entry]
+        if (len(entries) == 0):
+            del self._entries[entry[ENTRY_ITEM]]
+
+    def _siftDown(self, position):
+        heap = self.heap
+        size = len(heap)
+        entry = heap[position]
+        key = (entry[ENTRY_PRIORITY], entry[ENTRY_COUNT])
+
+        while (True):
+            child = 2 * position + 1
+            if (child >= size):
+                break
+
+            childKey = (heap[child][ENTRY_PRIORITY], heap[child][ENTRY_COUNT])
+
+            # Use the smaller of the two children.
+            right = child + 1
+            if (right < size):
+                rightKey = (heap[right][ENTRY_PRIORITY], heap[right][ENTRY_COUNT])
+                if (rightKey < childKey):
+                    child = right
+                    childKey = rightKey
+
+            if (key <= childKey):
+                break
+
+            heap[position] = heap[child]
+            heap[position][ENTRY_POSITION] = position
+            position = child
+
+        heap[position] = entry
+        entry[ENTRY_POSITION] = position
+
+    def _siftUp(self, position):
+        heap = self.heap
+        entry = heap[position]
+        key = (entry[ENTRY_PRIORITY], entry[ENTRY_COUNT])
+
+        while (position > 0):
+            parent = (position - 1) // 2
+            if ((heap[parent][ENTRY_PRIORITY], heap[parent][ENTRY_COUNT]) <= key):
+                break
+
+            heap[position] = heap[parent]
+            heap[position][ENTRY_POSITION] = position
+            position = parent
+
+        heap[position] = entry
+        entry[ENTRY_POSITION] = position
+
+    def __contains__(self, item):
+        return self._findEntry(item) is not None
+
     def __len__(self):
         return len(self.heap)
 
@@ -54,5 +215,13 @@ class PriorityQueueWithFunction(PriorityQueue):
 
         super().push(item, self.priorityFunction(item))
 
+    def update(self, item):
+        """
+        Adds an item to the queue (or lowers its priority if it is already queued)
+        with the priority from the priority function.
+        """
+
+        super().update(item, self.priorityFunction(item))
+
     def __len__(self):
         return len(self.heap)
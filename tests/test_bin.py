@@ -1,8 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
+from pacai.core import layout as layoutModule
 
 """
 This is a test class to assess the executables of this project.
@@ -29,6 +33,19 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_pacman_layout_cache(self):
+        layoutDir = tempfile.mkdtemp()
+        path = os.path.join(layoutDir, 'testClassic.lay')
+        shutil.copy(os.path.join(layoutModule.DEFAULT_LAYOUT_DIR, 'testClassic.lay'), path)
+
+        try:
+            pacman.main(['-p', 'GreedyAgent', '--null-graphics', '-l', path, '--layout-cache'])
+            self.assertTrue(os.path.isfile(path + layoutModule.SIDECAR_EXTENSION))
+        finally:
+            layoutModule.setUseSidecars(False)
+            layoutModule._layoutCache.pop(path, None)
+            shutil.rmtree(layoutDir)
+
     def test_capture(self):
         # Run game of capture with default agents.
         capture.main(['--null-graphics'])
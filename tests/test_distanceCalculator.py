@@ -0,0 +1,262 @@
+import os
+import tempfile
+import unittest
+
+from pacai.core.actions import Actions
+from pacai.core import distanceCalculator
+from pacai.core.distanceCalculator import Distancer
+from pacai.core.distanceCalculator import computeDistances
+from pacai.core.grid import Grid
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+"""
+Test the maze distances against a simple search.
+"""
+class DistanceCalculatorTest(unittest.TestCase):
+    def _searchDistances(self, layout, source):
+        distances = {source: 0}
+        frontier = [source]
+
+        while (len(frontier) > 0):
+            nextFrontier = []
+            for position in frontier:
+                for neighbor in Actions.getLegalNeighbors(position, layout.walls):
+                    if (neighbor not in distances):
+                        distances[neighbor] = distances[position] + 1
+                        nextFrontier.append(neighbor)
+
+            frontier = nextFrontier
+
+        return distances
+
+    def test_compute_distances(self):
+        layout = getLayout('tinyCapture')
+        table = computeDistances(layout)
+
+        positions = layout.walls.asList(False)
+        self.assertEqual(positions, table.getPositions())
+
+        for source in positions:
+            expected = self._searchDistances(layout, source)
+            for target in positions:
+                self.assertEqual(expected[target], table.getDistanceOnGrid(source, target))
+
+    def test_distancer(self):
+        layout = getLayout('tinyCapture')
+        distancer = Distancer(layout)
+        x, y = layout.walls.asList(False)[0]
+
+        # Without the maze distances, manhattan distance is used.
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertEqual(1, distancer.getDistance((0, 0), (1, 0)))
+
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+
+        self.assertEqual(0, distancer.getDistance((x, y), (float(x), float(y))))
+        self.assertEqual(0.5, distancer.getDistance((x, y), (x, y + 0.5)))
+
+        # Walls are not in the grid.
+        with self.assertRaises(Exception):
+            distancer.getDistanceOnGrid((0, 0), (x, y))
+
+    def test_batch_distances(self):
+        layout = getLayout('mediumCapture')
+        positions = layout.walls.asList(False)
+        source = positions[10]
+        targets = positions[::3] + [(source[0] + 0.5, source[1])]
+
+        distancer = Distancer(layout)
+        for ready in [False, True]:
+            if (ready):
+                distancer.getMazeDistances()
+
+            expected = [distancer.getDistance(source, target) for target in targets]
+            self.assertEqual(expected, distancer.getDistances(source, targets))
+
+            nearest = distancer.getNearest(source, targets[1:])
+            self.assertEqual(min(expected[1:]), nearest[1])
+            self.assertEqual(nearest[1], distancer.getDistance(source, nearest[0]))
+
+            # Include a source between grid positions.
+            sources = targets[:4] + targets[-1:]
+            matrix = distancer.getDistanceMatrix(sources, targets)
+            self.assertEqual([[distancer.getDistance(pos1, pos2) for pos2 in targets]
+                    for pos1 in sources], matrix)
+
+        with self.assertRaises(ValueError):
+            distancer.getNearest(source, [])
+
+    def test_shared_tables(self):
+        distanceCalculator.clearDistanceCache()
+
+        # Different layout objects with the same walls share a table.
+        first = Distancer(getLayout('tinyCapture'))
+        first.getMazeDistances()
+
+        second = Distancer(getLayout('tinyCapture'))
+        second.getMazeDistances()
+
+        self.assertIs(first._distances, second._distances)
+        self.assertEqual(1, len(distanceCalculator.distanceMap))
+
+        other = getLayout('mediumCapture')
+        distanceCalculator.precomputeDistances(other)
+        self.assertEqual(2, len(distanceCalculator.distanceMap))
+        self.assertIs(distanceCalculator.getDistanceTable(other),
+                distanceCalculator.distanceMap[distanceCalculator.getWallsKey(other.walls)])
+
+    def test_cache_size(self):
+        names = ['tinyCapture', 'mediumCapture', 'defaultCapture']
+
+        try:
+            distanceCalculator.clearDistanceCache()
+            distanceCalculator.setMaxCachedTables(2)
+
+            tables = [distanceCalculator.getDistanceTable(getLayout(name)) for name in names]
+            self.assertEqual(2, len(distanceCalculator.distanceMap))
+
+            # The least recently used table was forgotten.
+            self.assertIs(tables[2], distanceCalculator.getDistanceTable(getLayout(names[2])))
+            self.assertIsNot(tables[0], distanceCalculator.getDistanceTable(getLayout(names[0])))
+            self.assertIsNot(tables[1], distanceCalculator.getDistanceTable(getLayout(names[1])))
+
+            distanceCalculator.setMaxCachedTables(1)
+            self.assertEqual(1, len(distanceCalculator.distanceMap))
+        finally:
+            distanceCalculator.setMaxCachedTables()
+            distanceCalculator.clearDistanceCache()
+
+    def test_cache_dir(self):
+        layout = getLayout('mediumCapture')
+        expected = computeDistances(layout)
+        positions = expected.getPositions()
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            path = os.path.join(cacheDir,
+                    distanceCalculator.getWallsKey(layout.walls) + '.dist')
+
+            try:
+                distanceCalculator.setCacheDir(cacheDir)
+
+                # The first time, the table is computed and saved.
+                distanceCalculator.clearDistanceCache()
+                distanceCalculator.precomputeDistances(layout)
+                self.assertTrue(os.path.isfile(path))
+
+                # The second time, the table is loaded.
+                distanceCalculator.clearDistanceCache()
+                table = distanceCalculator.getDistanceTable(layout)
+                if (os.name != 'nt'):
+                    self.assertIsInstance(table._distances, memoryview)
+
+                for source in positions[::7]:
+                    for target in positions:
+                        self.assertEqual(expected.getDistanceOnGrid(source, target),
+                                table.getDistanceOnGrid(source, target))
+
+                # Tables are still usable after the cache forgets them.
+                distanceCalculator.clearDistanceCache()
+                self.assertEqual(expected.getDistanceOnGrid(positions[0], positions[-1]),
+                        table.getDistanceOnGrid(positions[0], positions[-1]))
+
+                # The file cannot be replaced while it is mapped on some platforms.
+                del table
+
+                # Bad files are replaced.
+                with open(path, 'wb') as file:
+                    file.write(b'garbage')
+
+                distanceCalculator.clearDistanceCache()
+                with self.assertLogs(level = 'WARNING'):
+                    distanceCalculator.precomputeDistances(layout)
+
+                distanceCalculator.clearDistanceCache()
+                table = distanceCalculator.loadDistanceTable(path, layout.walls)
+                self.assertIsNotNone(table)
+                table.close()
+            finally:
+                distanceCalculator.setCacheDir(None)
+                distanceCalculator.clearDistanceCache()
+
+    def test_too_many_positions(self):
+        # Distances in a long enough corridor would not fit in a table.
+        walls = Grid(distanceCalculator.UNREACHABLE + 1, 1)
+        layout = Layout(['%'])
+        layout.walls = walls
+
+        for compute in [distanceCalculator.computeLazyDistances,
+                distanceCalculator.computeLandmarkDistances]:
+            with self.assertRaises(ValueError):
+                compute(layout)
+
+    def test_lazy_distances(self):
+        layout = getLayout('mediumCapture')
+        expected = computeDistances(layout)
+        positions = expected.getPositions()
+
+        # Only keep around two rows.
+        table = distanceCalculator.computeLazyDistances(layout, 2 * 2 * len(positions))
+
+        for source in positions[::5]:
+            for target in positions:
+                self.assertEqual(expected.getDistanceOnGrid(source, target),
+                        table.getDistanceOnGrid(source, target))
+
+            self.assertTrue(len(table._rows) <= 2)
+
+        index = table.getIndex(positions[3])
+        self.assertEqual(list(expected.getRow(index)), list(table.getRow(index)))
+
+    def test_landmark_distances(self):
+        layout = getLayout('mediumCapture')
+        expected = computeDistances(layout)
+        positions = expected.getPositions()
+
+        table = distanceCalculator.computeLandmarkDistances(layout, 4)
+        self.assertEqual(4, len(table.getLandmarks()))
+
+        for source in positions[::9]:
+            for target in positions[::2]:
+                distance = expected.getDistanceOnGrid(source, target)
+                self.assertEqual(distance, table.getDistanceOnGrid(source, target))
+                self.assertTrue(table.getLowerBound(source, target) <= distance)
+
+            # Rows are cached and then used for distances.
+            row = table.getRow(table.getIndex(source))
+            self.assertIs(row, table.getRow(table.getIndex(source)))
+            self.assertEqual(list(expected.getRow(table.getIndex(source))), list(row))
+            self.assertEqual(expected.getDistanceOnGrid(positions[1], source),
+                    table.getDistanceOnGrid(positions[1], source))
+
+            # The bounds are exact from a landmark.
+            for landmark in table.getLandmarks():
+                self.assertEqual(expected.getDistanceOnGrid(source, landmark),
+                        table.getLowerBound(source, landmark))
+
+    def test_lazy_threshold(self):
+        layout = getLayout('mediumCapture')
+
+        try:
+            distanceCalculator.clearDistanceCache()
+            distanceCalculator.setLazyOptions(threshold = 10)
+
+            table = distanceCalculator.getDistanceTable(layout)
+            self.assertIsInstance(table, distanceCalculator.LazyDistanceTable)
+
+            distanceCalculator.clearDistanceCache()
+            distanceCalculator.setLandmarkOptions(threshold = 20)
+
+            table = distanceCalculator.getDistanceTable(layout)
+            self.assertIsInstance(table, distanceCalculator.LandmarkDistanceTable)
+        finally:
+            distanceCalculator.setLazyOptions()
+            distanceCalculator.setLandmarkOptions()
+            distanceCalculator.clearDistanceCache()
+
+        table = distanceCalculator.getDistanceTable(layout)
+        self.assertNotIsInstance(table, distanceCalculator.LazyDistanceTable)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.distanceCalculator import DEFAULT_DISTANCE
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search.food import CompactFoodSearchProblem
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.heuristic import FoodDistances
+from pacai.core.search.heuristic import mazeFood
+from pacai.core.search.heuristic import numFood
+
+"""
+Test the compact food search against the grid-based one.
+"""
+class FoodSearchTest(unittest.TestCase):
+    def test_compact_state(self):
+        for name in ['testSearch', 'tinySearch']:
+            state = PacmanGameState(getLayout(name))
+
+            expected = FoodSearchProblem(state)
+            expectedActions = engine.bfs(expected)
+
+            problem = CompactFoodSearchProblem(state)
+            actions = engine.bfs(problem)
+
+            self.assertEqual(expected.actionsCost(expectedActions), problem.actionsCost(actions))
+            self.assertEqual(expected.getExpandedCount(), problem.getExpandedCount())
+
+            start = problem.startingState()
+            self.assertEqual(numFood(expected.startingState(), expected), numFood(start, problem))
+            self.assertEqual(state.getPacmanPosition(), problem.getPosition(start))
+            self.assertEqual(state.getFood().asList(), problem.getFoodPositions(start))
+
+            # The GUI highlights the positions that were expanded.
+            self.assertTrue(len(problem.getVisitHistory()) > 0)
+            for position in problem.getVisitHistory():
+                self.assertFalse(state.hasWall(*position))
+
+    def test_successors(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        expected = FoodSearchProblem(state)
+        problem = CompactFoodSearchProblem(state)
+
+        expectedState = expected.startingState()
+        compactState = problem.startingState()
+
+        # Walk a few steps, always taking the last successor.
+        for i in range(10):
+            expectedSuccessors = expected.successorStates(expectedState)
+            successors = problem.successorStates(compactState)
+
+            self.assertEqual([action for (s, action, cost) in expectedSuccessors],
+                    [action for (s, action, cost) in successors])
+
+            expectedState = expectedSuccessors[-1][0]
+            compactState = successors[-1][0]
+
+            self.assertEqual(expectedState[0], problem.getPosition(compactState))
+            self.assertEqual(expectedState[1].asList(), problem.getFoodPositions(compactState))
+            self.assertEqual(expected.isGoal(expectedState), problem.isGoal(compactState))
+
+    def test_maze_food_heuristic(self):
+        state = PacmanGameState(getLayout('trickySearch'))
+
+        problem = CompactFoodSearchProblem(state)
+        expectedCost = problem.actionsCost(engine.ucs(problem))
+        expectedExpanded = problem.getExpandedCount()
+
+        for problemClass in [CompactFoodSearchProblem, FoodSearchProblem]:
+            problem = problemClass(state)
+            actions = engine.astar(problem, heuristic = mazeFood)
+
+            self.assertEqual(expectedCost, problem.actionsCost(actions))
+            self.assertTrue(problem.getExpandedCount() < expectedExpanded / 10)
+
+        # The estimate is never more than the real cost.
+        problem = CompactFoodSearchProblem(PacmanGameState(getLayout('tinySearch')))
+        searchState = problem.startingState()
+        estimate = mazeFood(searchState, problem)
+        self.assertTrue(0 < estimate <= problem.actionsCost(engine.bfs(problem)))
+        self.assertEqual(0, mazeFood((searchState[0], 0), problem))
+
+        # Only a few spanning trees are remembered.
+        foodDistances = FoodDistances(problem, memoSize = 2)
+        numFood = len(foodDistances.getFoodPositions())
+        for mask in range(1, 1 << numFood, 7):
+            foodDistances.getMSTWeight(mask)
+
+        self.assertEqual(2, len(foodDistances._mstWeights))
+
+        # Food that cannot be reached is DEFAULT_DISTANCE away, like any other distance lookup.
+        problem = CompactFoodSearchProblem(PacmanGameState(Layout(['%%%%%%', '%P.%.%', '%%%%%%'])))
+        foodDistances = FoodDistances(problem)
+        self.assertEqual(DEFAULT_DISTANCE, foodDistances.getMSTWeight(0b11))
+        self.assertEqual(1 + DEFAULT_DISTANCE, foodDistances.estimate(problem.startingState()))
+
+if __name__ == '__main__':
+    unittest.main()
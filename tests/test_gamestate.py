@@ -0,0 +1,290 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+"""
+Test the bookkeeping that game states do as they change.
+"""
+class GameStateTest(unittest.TestCase):
+    def _boardHash(self, state):
+        layout = state.getInitialLayout()
+        foodKeys, capsuleKeys = layout.getHashKeys()
+
+        hashCode = 0
+        for (x, y) in state.getFood().asList():
+            hashCode ^= foodKeys[layout.getCellIndex(x, y)]
+
+        for (x, y) in state.getCapsules():
+            hashCode ^= capsuleKeys[layout.getCellIndex(x, y)]
+
+        return hashCode
+
+    def _firstAction(self, state):
+        return [action for action in state.getLegalActions(0) if action != Directions.STOP][0]
+
+    def test_incremental_hash(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        self.assertEqual(self._boardHash(state), state._boardHash)
+
+        # Eat some food and a capsule.
+        successor = state.generateSuccessor(0, self._firstAction(state))
+        food = state.getFood().asList()[0]
+        capsule = state.getCapsules()[0]
+
+        successor.eatFood(*food)
+        successor.eatCapsule(*capsule)
+
+        self.assertEqual(self._boardHash(successor), successor._boardHash)
+        self.assertEqual(self._boardHash(state), state._boardHash)
+        self.assertNotEqual(hash(state), hash(successor))
+
+    def test_equal_states_hash_equal(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        first = state.generateSuccessor(0, self._firstAction(state))
+        first.eatFood(*state.getFood().asList()[0])
+        first.eatFood(*state.getFood().asList()[1])
+
+        second = state.generateSuccessor(0, self._firstAction(state))
+        second.eatFood(*state.getFood().asList()[1])
+        second.eatFood(*state.getFood().asList()[0])
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_agent_hash_cleared(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        ghostState = state.getAgentState(1)
+
+        oldHash = hash(ghostState)
+        ghostState.setScaredTimer(10)
+        self.assertNotEqual(oldHash, hash(ghostState))
+
+        ghostState.setScaredTimer(0)
+        self.assertEqual(oldHash, hash(ghostState))
+
+    def test_agent_copy_on_write(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        startPosition = state.getPacmanPosition()
+
+        successor = state.generateSuccessor(0, self._firstAction(state))
+
+        # Only the agent that moved gets a new state.
+        self.assertIsNot(state.getAgentState(0), successor.getAgentState(0))
+        for index in state.getGhostIndexes():
+            self.assertIs(state.getAgentState(index), successor.getAgentState(index))
+
+        # Modifying the successor should not touch the parent (and vice versa).
+        successor.getMutableAgentState(1).setScaredTimer(10)
+        self.assertEqual(0, state.getAgentState(1).getScaredTimer())
+        self.assertEqual(10, successor.getAgentState(1).getScaredTimer())
+
+        state.getMutableAgentState(2).setScaredTimer(5)
+        self.assertEqual(0, successor.getAgentState(2).getScaredTimer())
+        self.assertEqual(startPosition, state.getPacmanPosition())
+
+    def _agentSummary(self, state):
+        return [(agentState.getPosition(), agentState.getDirection(),
+                agentState.isPacman(), agentState.getScaredTimer())
+                for agentState in state.getAgentStates()]
+
+    def _checkUndo(self, state, numMoves, seed):
+        rng = random.Random(seed)
+        history = []
+
+        agentIndex = 0
+        for i in range(numMoves):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            successor = state.generateSuccessor(agentIndex, action)
+
+            history.append((agentIndex, action, successor, hash(state), state.getScore(),
+                    state.getNumFood(), list(state.getCapsules()), self._agentSummary(state)))
+
+            # Moving in place should match the successor.
+            history[-1] += (state.applyMove(agentIndex, action), )
+            self.assertEqual(successor, state)
+            self.assertEqual(hash(successor), hash(state))
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        self.assertTrue(len(history) > 0)
+
+        while (len(history) > 0):
+            (agentIndex, action, successor, stateHash, score, numFood, capsules, agents,
+                    record) = history.pop()
+
+            state.undoMove(record)
+
+            self.assertEqual(stateHash, hash(state))
+            self.assertEqual(score, state.getScore())
+            self.assertEqual(numFood, state.getNumFood())
+            self.assertEqual(capsules, state.getCapsules())
+            self.assertEqual(agents, self._agentSummary(state))
+            self.assertFalse(state.isOver())
+
+            # Successors made before the move should not have been affected by it.
+            self.assertEqual(successor, state.generateSuccessor(agentIndex, action))
+
+    def test_apply_undo_pacman(self):
+        # This seed eats food and a capsule before pacman dies.
+        self._checkUndo(PacmanGameState(getLayout('capsuleClassic')), 300, 9)
+
+    def test_apply_undo_capture(self):
+        # This seed eats some food.
+        self._checkUndo(CaptureGameState(getLayout('tinyCapture'), 1000), 600, 0)
+
+    def test_apply_terminal(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        action = self._firstAction(state)
+        state.endGame(False)
+
+        with self.assertRaises(RuntimeError):
+            state.applyMove(0, action)
+
+        # Unchecked moves trust the caller, like generateSuccessorUnchecked().
+        expected = state.generateSuccessorUnchecked(0, action)
+        record = state.applyMove(0, action, validate = False)
+        self.assertEqual(expected, state)
+
+        state.undoMove(record)
+        self.assertTrue(state.isLose())
+
+    def test_undo_shared_successor(self):
+        state = PacmanGameState(getLayout('mediumClassic'))
+        x, y = state.getFood().asList()[0]
+        state.eatFood(x, y)
+
+        action = state.getLegalActions(1)[0]
+        record = state.applyMove(1, action)
+        successor = state.generateSuccessor(1, action)
+        numFood = successor.getNumFood()
+        state.undoMove(record)
+
+        # The successor made during the move shares data with the restored state.
+        x, y = state.getFood().asList()[0]
+        state.eatFood(x, y)
+        state.getMutableAgentState(2).setScaredTimer(9)
+
+        self.assertEqual(numFood, successor.getNumFood())
+        self.assertTrue(successor.hasFood(x, y))
+        self.assertEqual(0, successor.getAgentState(2).getScaredTimer())
+
+    def test_unchecked_successors(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        for agentIndex in range(state.getNumAgents()):
+            for action in state.getLegalActions(agentIndex):
+                self.assertEqual(state.generateSuccessor(agentIndex, action),
+                        state.generateSuccessorUnchecked(agentIndex, action))
+
+        # Only the checked version looks at the action.
+        with self.assertRaises(ValueError):
+            state.generateSuccessor(1, Directions.STOP)
+
+    def test_batched_successors(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        for agentIndex in range(state.getNumAgents()):
+            successors = state.generateSuccessors(agentIndex)
+
+            self.assertEqual(state.getLegalActions(agentIndex),
+                    [action for action, successor in successors])
+            for action, successor in successors:
+                self.assertEqual(state.generateSuccessor(agentIndex, action), successor)
+
+        actions = [action for action, successor in state.generateSuccessors(0, False)]
+        self.assertNotIn(Directions.STOP, actions)
+
+        # Nothing to generate for a finished game.
+        state.endGame(False)
+        self.assertEqual([], state.generateSuccessors(0))
+
+    def test_grid_successors(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        # Full speed agents are always on the grid.
+        action = self._firstAction(state)
+        self.assertEqual(state.generateSuccessor(0, action), state.generateGridSuccessor(0, action))
+
+        # Scared ghosts move at half speed.
+        state.getMutableAgentState(1).setScaredTimer(10)
+        action = state.getLegalActions(1)[0]
+
+        halfway = state.generateSuccessor(1, action)
+        self.assertNotEqual(halfway.getGhostPosition(1), state.getGhostPosition(1))
+        self.assertNotIn(halfway.getGhostPosition(1), state.getInitialLayout().walls.asList(False))
+
+        expected = halfway.generateSuccessor(1, action)
+        successor = state.generateGridSuccessor(1, action)
+        self.assertEqual(expected, successor)
+        self.assertEqual(8, successor.getGhostState(1).getScaredTimer())
+
+        with self.assertRaises(ValueError):
+            state.generateGridSuccessor(1, Directions.STOP)
+
+        # Agents between grid positions cannot stop (even if the action is trusted).
+        with self.assertRaises(ValueError):
+            halfway.generateGridSuccessor(1, Directions.STOP, validate = False)
+
+    def test_food_bookkeeping(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        initialFood = state.getFood().asList()
+
+        self.assertEqual(len(initialFood), state.getNumFood())
+        self.assertEqual(set(initialFood), state.getFoodPositions())
+
+        successor = state.generateSuccessor(0, self._firstAction(state))
+        numFood = successor.getNumFood()
+        food = successor.getFood().asList()[0]
+        successor.eatFood(*food)
+
+        self.assertEqual(numFood - 1, successor.getNumFood())
+        self.assertEqual(set(successor.getFood().asList()), successor.getFoodPositions())
+
+        # The parent should not see the changes.
+        self.assertEqual(len(initialFood), state.getNumFood())
+        self.assertIn(food, state.getFoodPositions())
+
+    def test_food_views(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        x, y = state.getFood().asList()[0]
+
+        with self.assertRaises(TypeError):
+            state.getFood()[x][y] = False
+
+        food = state.getFoodCopy()
+        food[x][y] = False
+        self.assertTrue(state.hasFood(x, y))
+
+        view = state.getFood()
+        successor = state.generateSuccessor(0, self._firstAction(state))
+        successor.eatFood(x, y)
+
+        self.assertTrue(view[x][y])
+        self.assertFalse(successor.getFood()[x][y])
+
+    def test_capture_food_bookkeeping(self):
+        state = CaptureGameState(getLayout('defaultCapture'), 100)
+
+        self.assertEqual(state.getRedFood().count(), state.getNumRedFood())
+        self.assertEqual(state.getBlueFood().count(), state.getNumBlueFood())
+        self.assertEqual(set(state.getRedFood().asList()), state.getRedFoodPositions())
+
+        successor = state.generateSuccessor(0, state.getLegalActions(0)[0])
+        food = state.getRedFood().asList()[0]
+        successor.eatFood(*food)
+
+        self.assertEqual(state.getNumRedFood() - 1, successor.getNumRedFood())
+        self.assertEqual(state.getNumBlueFood(), successor.getNumBlueFood())
+        self.assertNotIn(food, successor.getRedFoodPositions())
+        self.assertIn(food, state.getRedFoodPositions())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import pickle
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+from pacai.core.layout import getLayout
+
+"""
+Test the different grid backends against each other.
+"""
+class GridTest(unittest.TestCase):
+    def _buildGrids(self, layoutName = 'mediumClassic'):
+        layout = getLayout(layoutName)
+
+        grid = Grid(layout.width, layout.height)
+        bitGrid = BitGrid(layout.width, layout.height)
+
+        for x in range(layout.width):
+            for y in range(layout.height):
+                grid[x][y] = layout.walls[x][y]
+                bitGrid[x][y] = layout.walls[x][y]
+
+        return grid, bitGrid
+
+    def test_bit_grid_matches_grid(self):
+        grid, bitGrid = self._buildGrids()
+
+        self.assertEqual(grid.asList(), bitGrid.asList())
+        self.assertEqual(grid.asList(False), bitGrid.asList(False))
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(grid.count(False), bitGrid.count(False))
+        self.assertEqual(hash(grid), hash(bitGrid))
+        self.assertEqual(str(grid), str(bitGrid))
+        self.assertEqual(grid, bitGrid)
+        self.assertEqual(bitGrid, grid)
+
+    def test_bit_grid_copy(self):
+        grid, bitGrid = self._buildGrids()
+
+        copy = bitGrid.copy()
+        self.assertEqual(bitGrid, copy)
+        self.assertEqual(hash(bitGrid), hash(copy))
+
+        # Find an open cell to modify.
+        x, y = bitGrid.asList(False)[0]
+        copy[x][y] = True
+
+        self.assertTrue(copy[x][y])
+        self.assertFalse(bitGrid[x][y])
+        self.assertNotEqual(bitGrid, copy)
+
+        copy.set(x, y, False)
+        self.assertEqual(bitGrid, copy)
+
+    def test_bit_grid_bounds(self):
+        bitGrid = BitGrid(3, 2, initialValue = True)
+        self.assertEqual(6, bitGrid.count())
+        self.assertTrue(bitGrid[-1][-1])
+
+        with self.assertRaises(IndexError):
+            bitGrid[3]
+
+        with self.assertRaises(IndexError):
+            bitGrid[0][2]
+
+        # get() and set() check their bounds too (instead of using a cell in the next column).
+        bitGrid.set(0, 1, False)
+        self.assertFalse(bitGrid.get(0, -1))
+        self.assertTrue(bitGrid.get(-1, 0))
+
+        for (x, y) in [(0, 2), (3, 0), (-4, 0), (0, -3)]:
+            with self.assertRaises(IndexError):
+                bitGrid.get(x, y)
+
+            with self.assertRaises(IndexError):
+                bitGrid.set(x, y, True)
+
+        self.assertEqual(5, bitGrid.count())
+
+        # Iteration stops at the edges, just like a list of lists.
+        self.assertEqual(3, len([column for column in bitGrid]))
+        self.assertEqual([True, True], list(bitGrid[1]))
+
+    def test_frozen_bit_grid(self):
+        grid, bitGrid = self._buildGrids()
+        x, y = bitGrid.asList(False)[0]
+
+        frozen = bitGrid.freeze()
+        self.assertEqual(bitGrid, frozen)
+        self.assertEqual(hash(bitGrid), hash(frozen))
+
+        with self.assertRaises(TypeError):
+            frozen[x][y] = True
+
+        with self.assertRaises(TypeError):
+            frozen.set(x, y, True)
+
+        # Changes to the original do not show up in the frozen grid.
+        bitGrid[x][y] = True
+        self.assertFalse(frozen[x][y])
+
+        # Copies can be modified.
+        copy = frozen.copy()
+        copy[x][y] = True
+        self.assertEqual(bitGrid, copy)
+
+    def test_bit_grid_bytes(self):
+        grid, bitGrid = self._buildGrids()
+
+        loaded = BitGrid.fromBytes(bitGrid.getWidth(), bitGrid.getHeight(), bitGrid.toBytes())
+        self.assertEqual(bitGrid, loaded)
+
+    def test_bit_grid_pickle(self):
+        grid, bitGrid = self._buildGrids()
+        bitGrid[1][1]
+
+        loaded = pickle.loads(pickle.dumps(bitGrid))
+        self.assertEqual(bitGrid, loaded)
+        self.assertEqual(bitGrid[1][1], loaded[1][1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import heapq
+import itertools
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.layout import getLayout
+from pacai.core.search.junction import JunctionSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+
+"""
+Test the junction graph and searches on it.
+"""
+class JunctionGraphTest(unittest.TestCase):
+    def _follow(self, position, actions):
+        x, y = position
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = x + int(dx), y + int(dy)
+
+        return (x, y)
+
+    def _ucs(self, problem):
+        # The problem's costs are not uniform, so the search has to take them into account.
+        counter = itertools.count()
+        fringe = [(0, next(counter), problem.startingState(), [])]
+        closed = set()
+
+        while (len(fringe) > 0):
+            (cost, _, state, actions) = heapq.heappop(fringe)
+            if (problem.isGoal(state)):
+                return actions
+
+            if (state in closed):
+                continue
+
+            closed.add(state)
+            for (successor, action, stepCost) in problem.successorStates(state):
+                heapq.heappush(fringe,
+                        (cost + stepCost, next(counter), successor, actions + [action]))
+
+        return None
+
+    def test_graph(self):
+        for name in ['mediumMaze', 'mediumClassic', 'defaultCapture', 'openMaze']:
+            layout = getLayout(name)
+            graph = layout.getJunctionGraph()
+            cells = layout.walls.asList(False)
+
+            # Every cell is either a node or in exactly one corridor.
+            numCorridorCells = sum([edge.cost - 1 for edge in graph.getEdges()])
+            self.assertEqual(len(cells), len(graph.getNodes()) + numCorridorCells)
+
+            for cell in cells:
+                locations = graph.getLocations(cell)
+                if (not graph.isNode(cell)):
+                    self.assertEqual(1, len(locations))
+
+                for (edge, offset) in locations:
+                    self.assertEqual(cell, edge.cells[offset])
+                    self.assertEqual(cell, self._follow(edge.start, edge.getActions(0, offset)))
+                    self.assertEqual(edge.start,
+                            self._follow(cell, edge.getActions(offset, 0)))
+
+            for node in graph.getNodes():
+                for (neighbor, actions, cost) in graph.getNeighbors(node):
+                    self.assertEqual(neighbor, self._follow(node, actions))
+                    self.assertEqual(cost, len(actions))
+
+    def test_search(self):
+        for name in ['mediumMaze', 'bigMaze', 'mediumClassic']:
+            state = PacmanGameState(getLayout(name))
+            goal = state.getInitialLayout().walls.asList(False)[0]
+
+            expected = PositionSearchProblem(state, goal = goal)
+            expectedActions = self._ucs(expected)
+
+            problem = JunctionSearchProblem(state, goal = goal)
+            actions = problem.expandActions(self._ucs(problem))
+
+            self.assertEqual(goal, self._follow(problem.startingState(), actions))
+            self.assertEqual(expected.actionsCost(expectedActions), problem.actionsCost(actions))
+            self.assertTrue(problem.getExpandedCount() < expected.getExpandedCount())
+
+if __name__ == '__main__':
+    unittest.main()
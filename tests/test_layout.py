@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pacai.core import layout as layoutModule
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+"""
+Test the information that layouts precompute.
+"""
+class LayoutTest(unittest.TestCase):
+    def test_move_tables(self):
+        for name in ['mediumClassic', 'defaultCapture']:
+            layout = getLayout(name)
+
+            for position in layout.walls.asList(False):
+                for direction in Directions.CARDINAL:
+                    self.assertEqual(
+                            Actions.getPossibleActions(position, direction, layout.walls),
+                            layout.getPossibleActions(position, direction))
+
+                self.assertEqual(Actions.getLegalNeighbors(position, layout.walls),
+                        layout.getLegalNeighbors(position))
+
+    def test_move_tables_fractional(self):
+        layout = getLayout('mediumClassic')
+
+        # Between grid points, agents have to keep going.
+        x, y = layout.agentPositions[1][1]
+        position = (x + 0.5, y)
+        self.assertEqual([Directions.EAST], layout.getPossibleActions(position, Directions.EAST))
+        self.assertEqual(Actions.getLegalNeighbors(position, layout.walls),
+                layout.getLegalNeighbors(position))
+
+    def test_visibility(self):
+        layout = getLayout('mediumClassic')
+        openCells = layout.walls.asList(False)
+
+        for (x, y) in openCells:
+            seenByStop = set()
+
+            for direction in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(direction)
+
+                # Walk until we hit a wall.
+                seen = set()
+                position = (x, y)
+                while (not layout.walls[position[0]][position[1]]):
+                    seen.add(position)
+                    position = (int(position[0] + dx), int(position[1] + dy))
+
+                seenByStop |= seen
+                self.assertEqual(seen, set(layout.getVisibility((x, y), direction).asList()))
+
+            self.assertEqual(seenByStop,
+                    set(layout.getVisibility((x, y), Directions.STOP).asList()))
+
+        for source in openCells[::17]:
+            for direction in Directions.CARDINAL + [Directions.STOP]:
+                seen = layout.getVisibility(source, direction)
+                for target in openCells:
+                    self.assertEqual(seen.get(*target),
+                            layout.isVisibleFrom(target, source, direction))
+
+        self.assertEqual([], layout.getVisibility((0, 0), Directions.NORTH).asList())
+
+        # Positions off the board do not see anything (and do not wrap around).
+        for position in [(layout.getWidth(), 1), (1, layout.getHeight()), (-1, 1)]:
+            self.assertEqual([], layout.getVisibility(position, Directions.STOP).asList())
+            self.assertFalse(layout.isVisibleFrom((1, 1), position, Directions.STOP))
+
+    def _parse(self, path, maxGhosts = None):
+        with open(path, 'r') as file:
+            rows = [line.strip() for line in file if line.strip() != '']
+
+        return Layout(rows, maxGhosts)
+
+    def _checkSame(self, expected, layout):
+        self.assertEqual(expected.walls, layout.walls)
+        self.assertEqual(expected.food, layout.food)
+        self.assertEqual(expected.capsules, layout.capsules)
+        self.assertEqual(expected.agentPositions, layout.agentPositions)
+        self.assertEqual(expected.numGhosts, layout.numGhosts)
+        self.assertEqual(str(expected), str(layout))
+
+        for position in expected.walls.asList(False):
+            self.assertEqual(expected.getPossibleActions(position, Directions.STOP),
+                    layout.getPossibleActions(position, Directions.STOP))
+
+    def test_layout_cache(self):
+        path = os.path.join(layoutModule.DEFAULT_LAYOUT_DIR, 'mediumClassic.lay')
+
+        for maxGhosts in [None, 0, 1]:
+            self._checkSame(self._parse(path, maxGhosts), getLayout('mediumClassic',
+                    maxGhosts = maxGhosts))
+
+        # Each call gets its own copy.
+        first = getLayout('mediumClassic')
+        second = getLayout('mediumClassic')
+        self.assertIsNot(first, second)
+
+        x, y = first.food.asList()[0]
+        first.food[x][y] = False
+        self.assertTrue(second.food[x][y])
+
+    def test_layout_sidecar(self):
+        layoutDir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(layoutModule.DEFAULT_LAYOUT_DIR, 'mediumClassic.lay'), layoutDir)
+        path = os.path.join(layoutDir, 'mediumClassic.lay')
+
+        try:
+            layoutModule.setUseSidecars(True)
+
+            # The first load writes the sidecar, the next one (in a fresh process) reads it.
+            getLayout('mediumClassic', layoutDir)
+            self.assertTrue(os.path.isfile(path + layoutModule.SIDECAR_EXTENSION))
+
+            del layoutModule._layoutCache[path]
+            for maxGhosts in [None, 1]:
+                self._checkSame(self._parse(path, maxGhosts),
+                        getLayout('mediumClassic', layoutDir, maxGhosts = maxGhosts))
+
+            # Bad sidecars for an unchanged layout are ignored (and the layout is parsed again).
+            sidecarPath = path + layoutModule.SIDECAR_EXTENSION
+            with open(sidecarPath, 'rb') as file:
+                data = file.read()
+
+            for badData in [data[:(layoutModule.SIDECAR_HEADER.size + 10)], data + b'\xff']:
+                with open(sidecarPath, 'wb') as file:
+                    file.write(badData)
+
+                del layoutModule._layoutCache[path]
+                with self.assertLogs(level = 'WARNING'):
+                    self._checkSame(self._parse(path, None), getLayout('mediumClassic', layoutDir))
+        finally:
+            layoutModule.setUseSidecars(False)
+            layoutModule._layoutCache.pop(path, None)
+            shutil.rmtree(layoutDir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+from pacai.core.actions import Actions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+"""
+Test the layout analysis against simple searches.
+"""
+class LayoutAnalysisTest(unittest.TestCase):
+    def _countReachable(self, layout, start, blocked):
+        seen = set([start])
+        frontier = [start]
+
+        while (len(frontier) > 0):
+            position = frontier.pop()
+            for neighbor in Actions.getLegalNeighbors(position, layout.walls):
+                if (neighbor not in seen and neighbor != blocked):
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+
+        return len(seen)
+
+    def test_articulation_points(self):
+        for name in ['mediumClassic', 'defaultCapture', 'mediumMaze']:
+            layout = getLayout(name)
+            analysis = layout.getAnalysis()
+            cells = layout.walls.asList(False)
+
+            for cell in cells:
+                start = cells[0]
+                if (start == cell):
+                    start = cells[1]
+
+                # Removing a cell from a connected maze only disconnects it at articulation points.
+                splits = (self._countReachable(layout, start, cell) < len(cells) - 1)
+                self.assertEqual(splits, analysis.isArticulationPoint(cell), cell)
+
+    def test_dead_ends(self):
+        for name in ['mediumClassic', 'defaultCapture']:
+            layout = getLayout(name)
+            analysis = layout.getAnalysis()
+
+            for cell in layout.walls.asList(False):
+                if (not analysis.isDeadEnd(cell)):
+                    self.assertEqual(0, analysis.getDeadEndDepth(cell))
+                    self.assertIsNone(analysis.getDeadEndExit(cell))
+                    continue
+
+                # The only way out of a dead end is through its exit,
+                # which has to be an articulation point.
+                exit = analysis.getDeadEndExit(cell)
+                self.assertFalse(analysis.isDeadEnd(exit))
+                self.assertTrue(analysis.isArticulationPoint(exit))
+                self.assertTrue(self._countReachable(layout, cell, exit)
+                        < self._countReachable(layout, exit, None))
+
+                depth = analysis.getDeadEndDepth(cell)
+                self.assertTrue(depth >= 1)
+
+                if (depth > 1):
+                    self.assertTrue(any([analysis.getDeadEndDepth(neighbor) == depth - 1
+                            for neighbor in Actions.getLegalNeighbors(cell, layout.walls)]))
+
+    def test_tree_dead_ends(self):
+        # Mazes without any loops have nowhere to escape to, so nothing is a dead end.
+        for name in ['bigMaze', 'testMaze']:
+            layout = getLayout(name)
+            analysis = layout.getAnalysis()
+            self.assertEqual([], analysis.getDeadEndCells())
+
+        layout = Layout(['%%%%%', '%. .%', '%%.%%', '%%%%%'])
+        analysis = layout.getAnalysis()
+        self.assertEqual([], analysis.getDeadEndCells())
+        self.assertEqual([(2, 2)], analysis.getArticulationPoints())
+
+        # A loop with a tail, next to a separate part without a loop.
+        layout = Layout([
+            '%%%%%%%%%',
+            '%   % % %',
+            '% % % % %',
+            '%     %.%',
+            '%%%%%%%%%',
+        ])
+        analysis = layout.getAnalysis()
+
+        self.assertEqual([(4, 1), (5, 1), (5, 2), (5, 3)], analysis.getDeadEndCells())
+        self.assertEqual(4, analysis.getDeadEndDepth((5, 3)))
+        self.assertEqual((3, 1), analysis.getDeadEndExit((5, 3)))
+        self.assertFalse(analysis.isDeadEnd((7, 2)))
+
+    def test_borders(self):
+        layout = getLayout('defaultCapture')
+        analysis = layout.getAnalysis()
+        middle = int(layout.getWidth() / 2)
+
+        for (red, x) in [(True, middle - 1), (False, middle)]:
+            border = analysis.getBorderCells(red)
+            self.assertEqual([(x, y) for y in range(layout.getHeight())
+                    if not layout.walls[x][y]], border)
+
+            for (x, y) in analysis.getEntryCells(red):
+                self.assertIn((x, y), border)
+
+                otherX = middle
+                if (not red):
+                    otherX = middle - 1
+
+                self.assertFalse(layout.walls[otherX][y])
+
+        # Copies of a layout share the analysis.
+        self.assertIs(analysis, layout.copy().getAnalysis())
+        self.assertIs(analysis, getLayout('defaultCapture').getAnalysis())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search.heuristic import manhattan
+from pacai.core.search.position import PositionSearchProblem
+
+"""
+Test the reference searches.
+"""
+class SearchEngineTest(unittest.TestCase):
+    def _follow(self, position, actions):
+        x, y = position
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = x + int(dx), y + int(dy)
+
+        return (x, y)
+
+    def test_searches(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        # Costs that are not uniform (the same as StayEastSearchAgent).
+        costFunctions = [
+            lambda position: 1,
+            lambda position: 0.5 ** position[0],
+        ]
+
+        expectedCosts = []
+        for costFn in costFunctions:
+            expected = None
+
+            for search in [engine.ucs, engine.astar]:
+                problem = PositionSearchProblem(state, costFn = costFn)
+                actions = search(problem)
+
+                self.assertEqual(problem.goal, self._follow(problem.startingState(), actions))
+                if (expected is None):
+                    expected = problem.actionsCost(actions)
+
+                self.assertAlmostEqual(expected, problem.actionsCost(actions))
+
+            expectedCosts.append(expected)
+
+        for search in [engine.bfs, engine.dfs]:
+            problem = PositionSearchProblem(state)
+            actions = search(problem)
+
+            self.assertEqual(problem.goal, self._follow(problem.startingState(), actions))
+
+        # BFS is optimal for uniform costs.
+        expected = expectedCosts[0]
+        problem = PositionSearchProblem(state)
+        self.assertEqual(expected, problem.actionsCost(engine.bfs(problem)))
+
+        # Manhattan distance is consistent, so A* is still optimal.
+        problem = PositionSearchProblem(state)
+        actions = engine.astar(problem, heuristic = manhattan)
+        self.assertEqual(expected, problem.actionsCost(actions))
+
+        problem = PositionSearchProblem(state)
+        cost = problem.actionsCost(engine.wastar(problem, heuristic = manhattan))
+        self.assertTrue(cost <= engine.DEFAULT_WEIGHT * expected)
+
+        # A goal that can never be reached.
+        for search in engine.SEARCH_FUNCTIONS.values():
+            problem = PositionSearchProblem(state, goal = (0, 0))
+            self.assertIsNone(search(problem))
+
+    def test_agent_names(self):
+        agent = SearchAgent(0, fn = 'ucs')
+        self.assertIs(engine.uniformCostSearch, agent.searchFunction)
+
+        agent = SearchAgent(0, fn = 'astar', heuristic = 'pacai.core.search.heuristic.manhattan')
+        state = PacmanGameState(getLayout('mediumMaze'))
+        agent.registerInitialState(state)
+        self.assertEqual(68, len(agent._actions))
+
+        with self.assertRaises(ValueError):
+            SearchAgent(0, fn = 'notASearch')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,6 +22,15 @@ class UtilContainersTest(unittest.TestCase):
         for val in val_list:
             self.assertEqual(val, testQueue.pop())
 
+        testQueue.push(0)
+        testQueue.extend(val_list)
+        self.assertEqual(len(val_list) + 1, len(testQueue))
+
+        for val in [0] + val_list:
+            self.assertEqual(val, testQueue.pop())
+
+        self.assertTrue(testQueue.isEmpty())
+
     def test_stack(self):
         testStack = stack.Stack()
         self.assertTrue(testStack.isEmpty())
@@ -52,5 +61,56 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_priority_queue_ties(self):
+        testPriorityQueue = priorityQueue.PriorityQueue()
+
+        # Items with the same priority come out in order, and are never compared.
+        items = [object() for i in range(10)]
+        for item in items:
+            testPriorityQueue.push(item, 0)
+
+        for item in items:
+            self.assertIs(item, testPriorityQueue.pop())
+
+    def test_priority_queue_update(self):
+        testPriorityQueue = priorityQueue.PriorityQueue()
+
+        for val in range(10):
+            testPriorityQueue.push(val, val)
+
+        self.assertIn(5, testPriorityQueue)
+        self.assertNotIn(10, testPriorityQueue)
+
+        testPriorityQueue.decreaseKey(9, -1)
+        with self.assertRaises(ValueError):
+            testPriorityQueue.decreaseKey(8, 100)
+
+        with self.assertRaises(KeyError):
+            testPriorityQueue.decreaseKey(10, 0)
+
+        # Only lowers priorities, or adds new items.
+        testPriorityQueue.update(8, -2)
+        testPriorityQueue.update(0, 100)
+        testPriorityQueue.update(10, 4.5)
+
+        self.assertEqual(11, len(testPriorityQueue))
+
+        expected = [8, 9, 0, 1, 2, 3, 4, 10, 5, 6, 7]
+        self.assertEqual(expected, [testPriorityQueue.pop() for i in range(11)])
+        self.assertNotIn(8, testPriorityQueue)
+
+        # Unhashable items still work.
+        testPriorityQueue.push([1, 2], 1)
+        testPriorityQueue.push([3, 4], 0)
+        testPriorityQueue.update([1, 2], -1)
+
+        self.assertIn([3, 4], testPriorityQueue)
+        self.assertEqual([1, 2], testPriorityQueue.pop())
+
+        testPriorityQueue = priorityQueue.PriorityQueueWithFunction(lambda item: item[1])
+        testPriorityQueue.push(('a', 2))
+        testPriorityQueue.update(('b', 1))
+        self.assertEqual(('b', 1), testPriorityQueue.pop())
+
 if __name__ == '__main__':
     unittest.main()